@@ -0,0 +1,64 @@
+"""Compare a burst of document writes committed one by one with batched commits.
+
+Committing after every write is what a caller has to do today to make each
+write durable. `Database.batch` commits every `size` writes instead, and
+`Database.atomic` commits the whole burst once.
+
+Run from the repository root: `python -m benchmarks.bench_batch`
+"""
+from pathlib import Path
+import tempfile
+import time
+from typing import Callable
+
+from unqdantic import Database, Document
+
+
+def measure(label: str, write: Callable[[Database, type], None], number: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        path.touch()
+        db = Database(path)
+
+        class Event(Document):
+            name: str
+            value: int = 0
+
+            class Meta:
+                db = None
+                name = "event"
+
+        db.init_model(Event)
+        start = time.perf_counter()
+        write(db, Event)
+        elapsed = time.perf_counter() - start
+        assert Event.count() == number
+        db.close()
+    print(f"{label:14} {elapsed / number * 1e6:8.2f} us/op")
+    return elapsed
+
+
+def main(number: int = 2000) -> None:
+    def each(db: Database, model: type) -> None:
+        for i in range(number):
+            model(name=f"e{i}", value=i).insert()
+            db.commit()
+
+    def batched(db: Database, model: type) -> None:
+        with db.batch(size=500):
+            for i in range(number):
+                model(name=f"e{i}", value=i).insert()
+
+    def atomic(db: Database, model: type) -> None:
+        with db.atomic():
+            for i in range(number):
+                model(name=f"e{i}", value=i).insert()
+
+    before = measure("commit each", each, number)
+    for label, write in [("batch(500)", batched), ("atomic", atomic)]:
+        after = measure(label, write, number)
+        print(f"{label:14} speedup: {before / after:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
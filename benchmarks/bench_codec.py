@@ -0,0 +1,74 @@
+"""Compare the key-value codecs by encode and decode speed and database size.
+
+Every codec stores the same models in a namespace of a fresh database file;
+the file size is measured after the database is closed.
+
+Run from the repository root: `python -m benchmarks.bench_codec`
+"""
+from pathlib import Path
+import tempfile
+import time
+from typing import List
+
+from unqdantic import BinaryCodec, Codec, Database, JSONCodec
+
+from pydantic import BaseModel, Field
+
+
+class Info(BaseModel):
+    money: float = 100
+    level: int = 1
+
+
+class Session(BaseModel):
+    user: str
+    token: str
+    age: int = 18
+    active: bool = True
+    scopes: List[str] = Field(default_factory=list)
+    info: Info = Field(default_factory=Info)
+
+
+def make_session(i: int) -> Session:
+    return Session(
+        user=f"user{i}",
+        token=f"{i:032x}",
+        age=18 + i % 50,
+        scopes=["read", "write"][: i % 3],
+        info=Info(money=i % 1000, level=i % 10),
+    )
+
+
+def measure(name: str, codec: Codec, sessions: List[Session]) -> None:
+    start = time.perf_counter()
+    encoded = [codec.encode(session) for session in sessions]
+    encode = time.perf_counter() - start
+    start = time.perf_counter()
+    for data in encoded:
+        codec.decode(data, Session)
+    decode = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        path.touch()
+        db = Database(path, codec=codec)
+        db.namespace(Session).mset({str(i): s for i, s in enumerate(sessions)})
+        db.close()
+        size = path.stat().st_size
+    value = sum(len(data) for data in encoded) / len(encoded)
+    print(
+        f"{name:16} encode {encode / len(sessions) * 1e6:7.2f} us"
+        f"  decode {decode / len(sessions) * 1e6:7.2f} us"
+        f"  value {value:6.1f} B  file {size / 1024:9.1f} KiB",
+    )
+
+
+def main(number: int = 20000) -> None:
+    sessions = [make_session(i) for i in range(number)]
+    measure("json", JSONCodec(), sessions)
+    measure("json trusted", JSONCodec(trusted=True), sessions)
+    measure("binary", BinaryCodec(), sessions)
+    measure("binary trusted", BinaryCodec(trusted=True), sessions)
+
+
+if __name__ == "__main__":
+    main()
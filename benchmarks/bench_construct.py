@@ -0,0 +1,48 @@
+"""Compare model construction with the previous per instance id lookup.
+
+The `id` default used to call `collection.last_record_id()` for every model,
+including the ones built by `from_doc` whose id is overwritten right away.
+The previous cost is reproduced by adding that call to the construction.
+
+Run from the repository root: `python -m benchmarks.bench_construct`
+"""
+from timeit import timeit
+from typing import List
+
+from unqdantic import Database, Document
+
+db = Database(":mem:")
+
+
+class User(Document):
+    name: str
+    age: int = 18
+    tags: List[str] = ["a", "b", "c"]
+
+    class Meta:
+        db = db
+        name = "user"
+
+
+def previous(record=None):
+    User.collection.last_record_id()
+    return User.from_doc(dict(record)) if record else User(name="Ax")
+
+
+def main(number: int = 20000) -> None:
+    User.insert_many([User(name=f"user{i}") for i in range(1000)])
+    record = User.collection.fetch(500)
+    cases = [
+        ("User(...)", lambda: previous(), lambda: User(name="Ax")),
+        ("from_doc", lambda: previous(record), lambda: User.from_doc(dict(record))),
+    ]
+    for label, before, after in cases:
+        before_time = timeit(before, number=number)
+        after_time = timeit(after, number=number)
+        print(f"{label:10} before: {before_time / number * 1e6:8.2f} us/op")
+        print(f"{label:10} after:  {after_time / number * 1e6:8.2f} us/op")
+        print(f"{label:10} speedup: {before_time / after_time:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
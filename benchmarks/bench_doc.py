@@ -0,0 +1,60 @@
+"""Compare Document.doc() with the previous `json.loads(model.json())` path.
+
+Run from the repository root: `python -m benchmarks.bench_doc`
+"""
+from datetime import date, datetime
+from enum import Enum
+import json
+from timeit import timeit
+from typing import List
+
+from unqdantic import Document
+
+from pydantic import BaseModel, Field
+
+
+class Status(str, Enum):
+    ACTIVE = "active"
+    BANNED = "banned"
+
+
+class Address(BaseModel):
+    city: str = "Shanghai"
+    street: str = "Nanjing Road"
+    zip_code: str = Field("200000", alias="zipCode")
+
+
+class Profile(BaseModel):
+    money: float = 100.5
+    birthday: date = date(2000, 1, 1)
+    addresses: List[Address] = [Address(), Address(city="Beijing")]
+
+
+class User(Document):
+    name: str
+    age: int = 18
+    status: Status = Status.ACTIVE
+    created: datetime = datetime(2023, 1, 1, 12, 0, 0)
+    tags: List[str] = ["a", "b", "c"]
+    profile: Profile = Field(default_factory=Profile)
+
+    class Meta:
+        by_alias = True
+
+
+def json_round_trip(user: User):
+    return json.loads(user.json(by_alias=user.meta.by_alias))
+
+
+def main(number: int = 20000) -> None:
+    user = User(name="Ax")
+    assert user.doc() == json_round_trip(user)
+    before = timeit(lambda: json_round_trip(user), number=number)
+    after = timeit(user.doc, number=number)
+    print(f"json round trip: {before / number * 1e6:8.2f} us/op")
+    print(f"Document.doc():  {after / number * 1e6:8.2f} us/op")
+    print(f"speedup:         {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Compare validated and trusted Document.from_doc.
+
+Run from the repository root: `python -m benchmarks.bench_from_doc`
+"""
+from datetime import date
+from timeit import timeit
+from typing import List
+
+from unqdantic import Document
+
+from pydantic import BaseModel, Field
+
+
+class Address(BaseModel):
+    city: str = "Shanghai"
+    street: str = "Nanjing Road"
+
+
+class Profile(BaseModel):
+    money: float = 100.5
+    birthday: date = date(2000, 1, 1)
+    addresses: List[Address] = [Address(), Address(city="Beijing")]
+
+
+class User(Document):
+    name: str
+    age: int = 18
+    tags: List[str] = ["a", "b", "c"]
+    profile: Profile = Field(default_factory=Profile)
+
+
+def main(number: int = 20000) -> None:
+    record = User(name="Ax").doc()
+    record["__id"] = record.pop("id")
+    validated = timeit(lambda: User.from_doc(dict(record), False), number=number)
+    trusted = timeit(lambda: User.from_doc(dict(record), True), number=number)
+    print(f"validated from_doc: {validated / number * 1e6:8.2f} us/op")
+    print(f"trusted from_doc:   {trusted / number * 1e6:8.2f} us/op")
+    print(f"speedup:            {validated / trusted:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
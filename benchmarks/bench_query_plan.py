@@ -0,0 +1,64 @@
+"""Compare interpreted queries with plans cached by query shape.
+
+Run from the repository root: `python -m benchmarks.bench_query_plan`
+"""
+from timeit import timeit
+
+from unqdantic import Database, Document
+from unqdantic.jx9 import compile_query
+from unqdantic.plan import plan_query
+
+from pydantic import BaseModel, Field
+
+
+class Info(BaseModel):
+    money: float = 100
+    level: int = 1
+
+
+class User(Document):
+    name: str
+    age: int = 18
+    info: Info = Field(default_factory=Info)
+
+    class Meta:
+        db = Database(":mem:")
+        name = "user"
+
+
+def build_query(age: int):
+    return (User.age >= age) & (User.info.level < 5) & (User.name + "" != "nobody")
+
+
+def bind(plan):
+    return plan.jx9_filter, plan.residual
+
+
+def main(number: int = 20000) -> None:
+    User.insert_many([User(name=f"user{i}", age=i % 60) for i in range(10000)])
+    record = User.collection.fetch(42)
+    query = build_query(30)
+    predicate = plan_query(query).predicate
+    assert predicate(record) == query(record)
+
+    cases = [
+        (
+            "compile per call",
+            lambda: compile_query(build_query(30)),
+            lambda: bind(plan_query(build_query(30))),
+        ),
+        ("eval per record", lambda: query(record), lambda: predicate(record)),
+    ]
+    for label, before, after in cases:
+        before_time = timeit(before, number=number)
+        after_time = timeit(after, number=number)
+        print(f"{label:17} before: {before_time / number * 1e6:8.2f} us/op")
+        print(f"{label:17} after:  {after_time / number * 1e6:8.2f} us/op")
+        print(f"{label:17} speedup: {before_time / after_time:7.2f}x")
+
+    scan = timeit(lambda: User.collection.find(build_query(30)), number=10) / 10
+    print(f"find with residual over 10k records: {scan * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Benchmark suite for the ODM hot paths, compared with a stored baseline.
+
+Every case is timed per call on a collection seeded with `size` documents, in
+memory and on disk, and reported as operations per second with p50 and p99
+latencies. `--save` records the results as the baseline, later runs compare
+against it and exit with status 1 when the p50 latency of a case got worse
+than `--tolerance`; the median is used because it is the least noisy.
+Baselines depend on the machine, record one per machine you compare on.
+
+Run from the repository root:
+
+    python -m benchmarks.suite --sizes 10000 100000 --save
+    python -m benchmarks.suite --sizes 10000 100000
+"""
+import argparse
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from unqdantic import Database, Document
+
+from pydantic import BaseModel, Field
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+
+class Info(BaseModel):
+    money: float = 100
+    level: int = 1
+
+
+class User(Document):
+    name: str
+    age: int = 18
+    info: Info = Field(default_factory=Info)
+
+    class Meta:
+        db = None
+        name = "user"
+
+
+@dataclass
+class Result:
+    case: str
+    storage: str
+    size: int
+    ops: float
+    p50: float
+    p99: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}/{self.storage}/{self.size}"
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[int], Any]
+    """Run call `i` of the case."""
+    samples: int
+    units: int = 1
+    """Documents handled by one call, e.g. the batch size of `save_all`."""
+
+
+def make_user(i: int) -> User:
+    return User(
+        name=f"user{i}",
+        age=18 + i % 50,
+        info=Info(money=i % 1000, level=i % 10),
+    )
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def measure(case: Case) -> List[float]:
+    timings = []
+    for i in range(case.samples):
+        start = time.perf_counter()
+        case.run(i)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def cases(size: int, samples: int, scans: int) -> Iterator[Case]:
+    """Cases in run order, the writes come last so the reads see `size` documents."""
+    rng = random.Random(0)
+    ids = [rng.randrange(size) for _ in range(samples)]
+    yield Case("get_by_id", lambda i: User.get_by_id(ids[i]), samples)
+    yield Case(
+        "find_one",
+        lambda i: User.find_one(User.name == f"user{ids[i]}"),
+        scans,
+    )
+    yield Case(
+        "find_one_nested",
+        lambda i: User.find_one(User.info.money == ids[i] % 1000),
+        scans,
+    )
+    yield Case("find_all", lambda i: User.find_all(User.age == 18 + i % 50), scans)
+    yield Case(
+        "find_all_nested",
+        lambda i: User.find_all(User.info.level == i % 10, User.info.money < 500),
+        scans,
+    )
+    yield Case("export_all_to_dict", lambda i: User.export_all_to_dict(), scans)
+    documents = [User.get_by_id(id) for id in ids]
+    yield Case("update", lambda i: documents[i].update(age=i), samples)
+    yield Case("insert", lambda i: make_user(size + i).insert(), samples)
+    batch = 100
+    batches = max(samples // batch, 1)
+    yield Case(
+        "save_all",
+        lambda i: User.save_all(*(make_user(i * batch + j) for j in range(batch))),
+        batches,
+        batch,
+    )
+    dicts = [make_user(j).dict(exclude={"id"}) for j in range(batch)]
+    yield Case(
+        "bulk_save_from_dict",
+        lambda i: User.bulk_save_from_dict(dicts),
+        batches,
+        batch,
+    )
+    victims = list(dict.fromkeys(ids))
+    yield Case("delete", lambda i: User.delete_by_id(victims[i]), len(victims))
+
+
+def run(
+    storage: str,
+    size: int,
+    samples: int,
+    scans: int,
+    only: Optional[List[str]],
+) -> Iterator[Result]:
+    with tempfile.TemporaryDirectory() as directory:
+        if storage == "file":
+            path = Path(directory) / "bench.db"
+            path.touch()
+            db = Database(path)
+        else:
+            db = Database(":mem:")
+        db.init_model(User)
+        for start in range(0, size, 100_000):
+            User.insert_many(
+                make_user(i) for i in range(start, min(start + 100_000, size))
+            )
+        db.commit()
+        for case in cases(size, samples, scans):
+            if only and case.name not in only:
+                continue
+            timings = measure(case)
+            yield Result(
+                case.name,
+                storage,
+                size,
+                case.units * len(timings) / sum(timings),
+                percentile(timings, 0.5),
+                percentile(timings, 0.99),
+            )
+        db.close()
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text())
+    if data.get("machine") != machine():
+        print(f"warning: baseline from {data.get('machine')}", file=sys.stderr)
+    return data["results"]
+
+
+def machine() -> str:
+    return " ".join(
+        (
+            platform.machine(),
+            platform.python_implementation(),
+            platform.python_version(),
+        ),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--storage", nargs="+", default=["mem", "file"])
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--scans", type=int, default=5, help="samples of scan cases")
+    parser.add_argument("--only", nargs="+", help="run only these cases")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="store as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    baseline = {} if args.save else load_baseline(args.baseline)
+    results: List[Result] = []
+    regressions = []
+    print(
+        f"{'case':20} {'storage':7} {'size':>8} {'ops/s':>12} {'p50':>10} {'p99':>10}",
+    )
+    for size in args.sizes:
+        for storage in args.storage:
+            for result in run(storage, size, args.samples, args.scans, args.only):
+                results.append(result)
+                line = (
+                    f"{result.case:20} {storage:7} {size:8} {result.ops:12.1f}"
+                    f" {result.p50 * 1e3:8.3f}ms {result.p99 * 1e3:8.3f}ms"
+                )
+                if result.key in baseline:
+                    ratio = baseline[result.key]["p50"] / result.p50
+                    line += f" {ratio:6.2f}x"
+                    if ratio < 1 - args.tolerance:
+                        line += " REGRESSION"
+                        regressions.append(result.key)
+                print(line, flush=True)
+
+    if args.save:
+        # keep the cases of the previous baseline that were not run this time
+        saved = load_baseline(args.baseline)
+        saved.update(
+            {r.key: {"ops": r.ops, "p50": r.p50, "p99": r.p99} for r in results},
+        )
+        data = {"machine": machine(), "results": saved}
+        args.baseline.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+        print(f"baseline saved to {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
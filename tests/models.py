@@ -1,4 +1,5 @@
 from datetime import date
+from typing import List, Optional
 
 from tests.database import database
 from unqdantic import Document
@@ -19,3 +20,26 @@ class User(Document):
     class Meta:
         db = database
         name = "user"
+
+
+class Item(Document):
+    name: str
+    price: float = 0
+    tags: List[str] = Field(default_factory=list)
+    note: Optional[str] = None
+    info: UserInfo = Field(default_factory=UserInfo)
+
+    class Meta:
+        db = database
+        name = "item"
+
+
+class Account(Document):
+    email: str
+    level: int = 0
+    info: UserInfo = Field(default_factory=UserInfo)
+
+    class Meta:
+        db = database
+        name = "account"
+        indexes = ("email", "level", "info.money")
@@ -0,0 +1,46 @@
+from typing import Optional
+
+from tests.database import database
+from unqdantic import Document
+
+
+class Order(Document):
+    user: str
+    amount: Optional[float] = None
+    status: str = "paid"
+
+    class Meta:
+        db = database
+        name = "order"
+        indexes = ("status",)
+
+
+def test_aggregate():
+    Order.save_all(
+        Order(user="a", amount=10),
+        Order(user="a", amount=5.5, status="refund"),
+        Order(user="b", amount=20),
+        Order(user="c"),
+    )
+    assert Order.count() == 4
+    assert Order.count(Order.user == "a") == 2
+    assert Order.count(Order.user + "x" == "ax") == 2
+    assert Order.count(Order.status == "paid") == 3
+    assert Order.exists(Order.user == "b")
+    assert not Order.exists(Order.user == "d")
+
+    assert Order.sum(Order.amount) == 35.5
+    assert Order.sum(Order.amount, Order.user == "a") == 15.5
+    assert Order.sum(Order.amount, Order.status == "paid") == 30
+    assert Order.min(Order.amount) == 5.5
+    assert Order.max(Order.amount, Order.user + "" != "b") == 10
+    assert Order.avg(Order.amount) == 35.5 / 3
+    assert Order.avg(Order.amount, Order.user == "c") is None
+
+    assert Order.group_by(Order.user) == {"a": 2, "b": 1, "c": 1}
+    assert Order.group_by(
+        Order.status,
+        Order.amount > 0,
+        aggregate="sum",
+        field=Order.amount,
+    ) == {"paid": 30, "refund": 5.5}
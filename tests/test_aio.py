@@ -0,0 +1,51 @@
+import asyncio
+
+from unqdantic import Database, Document
+
+
+async def scenario(database: Database):
+    class Task(Document):
+        title: str
+        done: bool = False
+
+        class Meta:
+            db = database
+            name = "task"
+
+    task = await Task(title="a").aio.insert()
+    assert task.id == 0
+    await Task.aio.insert_many([Task(title=f"t{i}") for i in range(5)])
+    assert await Task.aio.count() == 6
+    assert [t.title for t in await Task.aio.find_all(Task.title == "a")] == ["a"]
+
+    pending = Task.aio.find_iter(Task.title.startswith("t"), batch_size=2)
+    titles = [t.title async for t in pending]
+    assert titles == ["t0", "t1", "t2", "t3", "t4"]
+
+    assert await task.aio.update(done=True)
+    assert (await Task.aio.get_by_id(0)).done
+
+    try:
+        async with database.aio.transaction():
+            await Task(title="rolled back").aio.insert()
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert await Task.aio.count(Task.title == "rolled back") == 0
+
+    async with database.aio.transaction():
+        await Task.aio.update_many(Task.done == False, set={Task.done: True})  # noqa: E712
+    assert await Task.aio.count(Task.done == True) == 6  # noqa: E712
+
+    results = await asyncio.gather(
+        *(Task(title=f"c{i}").aio.insert() for i in range(10)),
+    )
+    assert sorted(t.id for t in results) == list(range(6, 16))
+
+
+def test_aio(tmp_path):
+    path = tmp_path / "aio.db"
+    path.touch()
+    database = Database(path)
+    asyncio.run(scenario(database))
+    database.close()
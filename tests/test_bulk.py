@@ -0,0 +1,80 @@
+from tests.database import database
+from unqdantic import Document
+from unqdantic.models import UNSAVED_ID
+
+from pydantic import ValidationError
+import pytest
+
+
+class Row(Document):
+    name: str
+    score: int = 0
+
+    class Meta:
+        db = database
+        name = "row"
+        indexes = ("score",)
+
+
+def test_insert_many():
+    rows = [Row(name=f"r{i}", score=i % 3) for i in range(10)]
+    result = Row.insert_many(rows, chunk_size=3)
+    assert result.ids == list(range(10))
+    assert result.count == 10
+    assert [row.id for row in rows] == result.ids
+    assert Row.get_by_id(7).name == "r7"
+    assert Row.count(Row.score == 1) == 3
+
+    more = [Row(name="a"), Row(name="b")]
+    assert Row.save_all(*more)
+    assert [row.id for row in more] == [10, 11]
+    assert not Row.save_all()
+    assert Row.insert_many([]).ids == []
+
+
+def test_bulk_save_from_dict():
+    Row.clear()
+    rows = Row.bulk_save_from_dict([{"name": "x"}, {"name": "y", "score": 5}])
+    assert [row.name for row in rows] == ["x", "y"]
+    assert Row.find_one(Row.score == 5).name == "y"
+
+
+def test_id_assigned_on_insert():
+    Row.clear()
+    row = Row(name="a")
+    assert row.id == UNSAVED_ID
+    assert row.insert().id == 0
+    assert Row(name="b").save().id == 1
+    Row.delete_by_id(1)
+    assert Row(name="c").insert().id == 2
+    assert [r.id for r in Row.find_all(Row.id >= 1)] == [2]
+    assert Row.find_one(Row.id == 0).name == "a"
+    Row.clear()
+    assert Row(name="d").insert().id == 0
+    Row.insert_many([Row(name="e")])
+    row = Row.find_one(Row.name == "d")
+    row.update(name="f")
+    assert all("id" not in record for record in Row.collection.all())
+    assert [r.id for r in Row.all()] == [0, 1]
+
+
+def test_update_delete_many():
+    Row.clear()
+    Row.insert_many([Row(name=f"r{i}", score=i % 3) for i in range(6)])
+    with pytest.raises(ValueError):
+        Row.update_many(Row.score == 1, set={Row.name: "one", "extra.n": 1})
+    with pytest.raises(ValidationError):
+        Row.update_many(Row.score == 1, set={Row.score: "many"})
+    assert Row.update_many(Row.score == 1, set={Row.name: "one"}) == 2
+    assert [r.id for r in Row.find_all(Row.name == "one")] == [1, 4]
+    assert "extra" not in Row.collection.fetch(4)
+    assert Row.count(Row.score == 1) == 2
+    assert Row.update_many(Row.name + "" == "r0", set={Row.score: "5"}) == 1
+    assert [r.id for r in Row.find_all(Row.score == 5)] == [0]
+    assert Row.update_many(Row.name == "none", set={Row.score: 1}) == 0
+
+    assert Row.delete_many(Row.score == 2) == 2
+    assert Row.count() == 4
+    assert Row.count(Row.score == 2) == 0
+    assert Row.delete_many() == 4
+    assert Row.count() == 0
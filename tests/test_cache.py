@@ -0,0 +1,46 @@
+import time
+
+from unqdantic import Database, Document
+
+cached_database = Database(":mem:", cache_size=2, cache_ttl=0.2)
+
+
+class Post(Document):
+    title: str
+    views: int = 0
+
+    class Meta:
+        db = cached_database
+        name = "post"
+
+
+def test_identity_map():
+    cache = cached_database.identity_map
+    assert cache is not None
+    Post.insert_many([Post(title=f"p{i}") for i in range(3)])
+
+    post = Post.get_by_id(0)
+    assert Post.get_by_id(0) is post
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    post.update(views=1)
+    fresh = Post.get_by_id(0)
+    assert fresh is not post and fresh.views == 1
+
+    Post.get_by_id(1)
+    Post.get_by_id(2)
+    assert len(cache) == 2 and cache.evictions == 1
+    assert Post.get_by_id(0) is not fresh
+
+    Post.update_many(Post.title == "p2", set={Post.views: 5})
+    assert Post.get_by_id(2).views == 5
+    Post.delete_by_id(2)
+    assert Post.get_by_id(2) is None
+
+    post = Post.get_by_id(1)
+    time.sleep(0.25)
+    assert Post.get_by_id(1) is not post
+
+    Post.clear()
+    assert len(cache) == 0
+    assert Post.get_by_id(1) is None
@@ -0,0 +1,75 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from tests.database import database
+from tests.models import UserInfo
+from unqdantic import Document
+from unqdantic.decoders import construct_document
+
+from pydantic import BaseModel
+
+
+class Box(BaseModel):
+    name: str
+    items: List[UserInfo] = []
+    extra: Dict[str, Any] = {}
+    size: Optional[float] = None
+
+
+class Note(Document):
+    name: str
+    tags: List[str] = []
+    info: UserInfo = UserInfo()
+
+    class Meta:
+        db = database
+        name = "note"
+        trusted_load = True
+
+
+def test_construct_document():
+    box = Box(
+        name="a",
+        items=[UserInfo(money=1, birthday=date(2020, 1, 1))],
+        extra={"a": [1]},
+        size=2,
+    )
+    data = box.dict()
+    data["items"] = [{"money": 1, "birthday": "2020-01-01"}]
+    constructed = construct_document(Box, data)
+    assert constructed == box
+    assert isinstance(constructed.items[0], UserInfo)
+    assert isinstance(constructed.items[0].birthday, date)
+    assert isinstance(constructed.size, float)
+    assert constructed.__fields_set__ == box.__fields_set__
+
+    assert construct_document(Box, {"items": []}) is None
+    assert construct_document(Box, {"name": 1}) is None
+    assert construct_document(Box, {"name": "a", "removed": 1}) is None
+    assert construct_document(Box, {"name": "a", "items": [{"birthday": "x"}]}) is None
+
+
+class Counts(BaseModel):
+    n: List[int] = []
+    by_key: Dict[str, int] = {}
+    total: int = 0
+
+
+def test_construct_checks_raw_values():
+    counts = construct_document(Counts, {"n": [1, 2], "by_key": {"a": 1}, "total": 3})
+    assert counts == Counts(n=[1, 2], by_key={"a": 1}, total=3)
+    assert construct_document(Counts, {"n": ["x", None]}) is None
+    assert construct_document(Counts, {"n": [True]}) is None
+    assert construct_document(Counts, {"by_key": {"a": "1"}}) is None
+    assert construct_document(Counts, {"total": False}) is None
+
+
+def test_trusted_from_doc():
+    Note(name="trusted", tags=["a"], info=UserInfo(money=5)).insert()
+    validated = Note.find_one(Note.name == "trusted", trusted=False)
+    trusted = Note.find_one(Note.name == "trusted")
+    assert validated == trusted
+    assert isinstance(trusted.info.birthday, date)
+
+    Note.collection.store({"name": "old", "removed": 1})
+    assert [note.name for note in Note.all()] == ["trusted", "old"]
@@ -0,0 +1,78 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum, IntEnum
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from unqdantic import Document
+from unqdantic.encoders import encode_document
+
+from pydantic import BaseModel, Field
+
+
+class Color(str, Enum):
+    RED = "red"
+
+
+class Level(IntEnum):
+    LOW = 1
+
+
+class Shape(Enum):
+    CIRCLE = "circle"
+
+
+class Point(BaseModel):
+    x: float
+    y: float = Field(0, alias="Y")
+
+
+class Hidden(BaseModel):
+    shown: int = 1
+    secret: str = Field("s", exclude=True)
+
+
+class Tags(BaseModel):
+    __root__: List[str]
+
+
+class Record(Document):
+    color: Color = Color.RED
+    level: Level = Level.LOW
+    shape: Shape = Shape.CIRCLE
+    created: datetime = datetime(2023, 1, 2, 3, 4, 5)
+    day: date = date(2023, 1, 2)
+    at: time = time(3, 4)
+    duration: timedelta = timedelta(minutes=1)
+    amount: Decimal = Decimal("1.5")
+    path: Path = Path("a/b")
+    uid: UUID = UUID(int=1)
+    points: List[Point] = [Point(x=1, Y=2)]
+    pair: Tuple[int, str] = (1, "a")
+    labels: Set[str] = {"a"}
+    mapping: Dict[int, Any] = {1: [Point(x=3)], 2: None}
+    hidden: Hidden = Hidden()
+    tags: Tags = Tags(__root__=["t"])
+    nothing: Optional[int] = None
+    name: str = Field("n", alias="Name")
+
+
+def test_encode_document():
+    record = Record()
+    for by_alias in (False, True):
+        expected = json.loads(record.json(by_alias=by_alias))
+        assert encode_document(record, by_alias) == expected
+
+
+def test_encode_json_encoders():
+    class Custom(Document):
+        day: date = date(2023, 1, 2)
+        point: Point = Point(x=1)
+
+        class Config:
+            json_encoders = {date: lambda d: d.year, float: lambda f: f}
+
+    custom = Custom()
+    assert encode_document(custom) == json.loads(custom.json())
@@ -0,0 +1,42 @@
+from unqdantic import Database, Document
+
+
+class Item(Document):
+    name: str
+    price: int = 0
+
+    class Meta:
+        db = None
+        name = "item"
+        indexes = ("name",)
+
+
+def test_explain_strategies():
+    database = Database(":mem:", documents=[Item])
+    Item.insert_many([Item(name=f"i{i}", price=i) for i in range(20)])
+
+    index = Item.explain(Item.name == "i3")
+    assert (index.strategy, index.access, index.estimated) == ("index", "fetch_many", 1)
+    assert (index.actual.scanned, index.actual.returned) == (1, 1)
+
+    jx9 = Item.explain(Item.price >= 15)
+    assert (jx9.strategy, jx9.access, jx9.estimated) == ("jx9", "filter_jx9", 20)
+    assert jx9.jx9 is not None
+    assert (jx9.actual.scanned, jx9.actual.returned) == (20, 5)
+    assert jx9.actual.filter_time == 0 and jx9.actual.validate_time > 0
+
+    python = Item.explain((Item.price + 1) > 10)
+    assert (python.strategy, python.access, python.jx9) == ("python", "filter", None)
+    assert python.actual.filter_time > 0 and python.actual.returned == 10
+
+    mixed = Item.explain(Item.price < 5, (Item.price + 1) > 2, limit=1)
+    assert (mixed.strategy, mixed.access) == ("jx9+python", "scan_jx9")
+    assert mixed.actual.returned == 1
+
+    ordered = Item.explain(order_by=-Item.name, limit=3, analyze=False)
+    assert ordered.access == "fetch in index order" and ordered.actual is None
+
+    report = str(jx9)
+    assert "strategy: jx9 via filter_jx9" in report
+    assert "actual records: scanned 20, returned 5" in report
+    database.close()
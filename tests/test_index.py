@@ -0,0 +1,130 @@
+from tests.models import Account, UserInfo
+from unqdantic import in_
+from unqdantic.index import plan_index_lookup
+
+
+def test_index_lookup():
+    Account.save_all(
+        Account(email="a@x.com", level=1),
+        Account(email="b@x.com", level=2, info=UserInfo(money=50)),
+        Account(email="c@y.com", level=2),
+    )
+    Account(email="d@y.com", level=3).insert()
+    index = Account.collection.indexes["email"]
+    assert index.ids("c@y.com") == [2]
+    indexes = Account.collection.indexes
+    assert plan_index_lookup(Account.level >= 2, indexes) == {1, 2, 3}
+    assert plan_index_lookup(Account.email.endswith("y.com"), indexes) is None
+
+    assert (account := Account.find_one(Account.email == "b@x.com"))
+    assert account.id == 1
+    assert [a.id for a in Account.find_all(Account.level >= 2)] == [1, 2, 3]
+    assert [a.id for a in Account.find_all(Account.level < 2)] == [0]
+    assert [a.id for a in Account.find_iter(Account.level >= 2)] == [1, 2, 3]
+    assert [a.id for a in Account.find_all(Account.email.startswith("c"))] == [2]
+    assert [a.id for a in Account.find_all(Account.info.money == 200)] == [0, 2, 3]
+    assert [a.id for a in Account.find_all(in_(Account.level, [1, 3]))] == [0, 3]
+    assert [
+        a.id
+        for a in Account.find_all(
+            (Account.level == 2) & (Account.email.endswith("y.com")),
+        )
+    ] == [2]
+
+
+def test_index_sync():
+    account = Account.find_one(Account.email == "a@x.com")
+    assert account
+    account.update(email="z@x.com", level=5)
+    assert not Account.find_one(Account.email == "a@x.com")
+    assert Account.find_one(Account.email == "z@x.com")
+    assert [a.id for a in Account.find_all(Account.level > 4)] == [account.id]
+
+    Account.delete_by_id(1)
+    assert Account.collection.indexes["email"].ids("b@x.com") == []
+    assert not Account.find_all(Account.email.startswith("b"))
+
+    Account.clear()
+    assert not Account.find_all(Account.level >= 0)
+    Account(email="e@x.com").insert()
+    assert len(Account.find_all(Account.level >= 0)) == 1
+
+
+def test_index_projection():
+    assert Account.find_all(Account.email == "e@x.com", only=[Account.level]) == [
+        {"id": 0, "level": 0},
+    ]
+
+
+def test_index_order_by():
+    Account.save_all(Account(email="f@x.com", level=4), Account(email="g@x.com"))
+    accounts = Account.find_all(order_by=-Account.level, limit=2)
+    assert [a.email for a in accounts] == ["f@x.com", "e@x.com"]
+    accounts = Account.find_all(Account.email != "f@x.com", order_by=Account.email)
+    assert [a.email for a in accounts] == ["e@x.com", "g@x.com"]
+    query = Account.email == "g@x.com"
+    accounts = Account.find_all(query, order_by=Account.level, limit=1)
+    assert [a.email for a in accounts] == ["g@x.com"]
+    explanation = Account.explain(query, order_by=Account.level, limit=1)
+    assert (explanation.strategy, explanation.access) == ("index", "fetch")
+    assert explanation.actual.scanned == 1
+    jx9 = Account.explain(
+        Account.email.endswith("x.com"),
+        order_by=Account.level,
+        limit=1,
+    )
+    assert jx9.access == "scan_jx9"
+    python = Account.explain((Account.level + 1) > 1, order_by=Account.level, limit=1)
+    assert python.access == "fetch in index order"
+
+
+def test_index_pages(monkeypatch):
+    Account.clear()
+    index = Account.collection.indexes["level"]
+    size = index.PAGE_SIZE
+    Account.save_all(*[Account(email=f"{i}@p.com", level=i % 2) for i in range(size)])
+    Account.save_all(*[Account(email=f"{i}@q.com", level=1) for i in range(size)])
+    assert Account.update_many(Account.level == 0, set={Account.level: 2}) == size // 2
+    assert index.ids(0) == []
+    assert index.ids(2) == list(range(0, size, 2))
+    assert len(index.ids(1)) == size * 3 // 2
+    assert Account.delete_many(Account.email.endswith("q.com")) == size
+    assert index.ids(1) == list(range(1, size, 2))
+
+    def walk():
+        raise AssertionError("the whole database is scanned")
+
+    monkeypatch.setattr(Account.collection.db, "items", walk)
+    index.invalidate()
+    assert plan_index_lookup(Account.level >= 1, Account.collection.indexes) == set(
+        range(size),
+    )
+    assert index._directory() == [(2, 1), (2, 2)]
+    Account.clear()
+    assert Account.collection.db.fetch(index.marker) == b"2:0"
+    index.invalidate()
+    assert index._directory() == []
+
+
+def test_index_legacy_format():
+    Account.clear()
+    Account(email="old@x.com", level=7).insert()
+    index = Account.collection.indexes["level"]
+    db = Account.collection.db
+    index.clear()
+    db.store(index.marker, "1")
+    db.store(index.key(7), "0,")
+    index.ensure()
+    assert index.ids(7) == [0]
+    assert [a.id for a in Account.find_all(Account.level >= 7)] == [0]
+
+
+def test_index_candidates_like_jx9():
+    Account.clear()
+    collection = Account.collection
+    collection.store({"email": "n@x.com", "level": 1, "info": {"birthday": None}})
+    collection.store({"email": "n@x.com", "level": 2, "info": {"birthday": "2001"}})
+    query = (Account.email == "n@x.com") & (Account.info.birthday > "2000")
+    assert [r["__id"] for r in collection.find(query)] == [1]
+    assert [r["__id"] for r in collection.find_iter(query, 1)] == [1]
+    assert collection.stats(query, ["level"]).total == 2
@@ -0,0 +1,52 @@
+import logging
+
+from unqdantic import Database, Document
+from unqdantic.instrument import Metrics, SlowQueryLog
+
+from pydantic import BaseModel, Field
+
+
+class Address(BaseModel):
+    city: str = "x"
+
+
+def test_operation_events(caplog):
+    database = Database(":mem:")
+
+    class Shop(Document):
+        name: str
+        address: Address = Field(default_factory=Address)
+
+        class Meta:
+            db = database
+            name = "shop"
+
+    events = []
+    database.add_hook(events.append)
+    metrics = database.add_hook(Metrics())
+    slow = database.add_hook(SlowQueryLog(threshold=0))
+
+    Shop.insert_many([Shop(name=f"s{i}") for i in range(10)])
+    with caplog.at_level(logging.WARNING, logger="unqdantic"):
+        shops = Shop.find_all(Shop.address.city == "x", Shop.name != "s1")
+    Shop.find_one(Shop.name == "s3")
+
+    insert, find_all, find_one = events
+    assert insert.collection == "shop" and insert.operation == "insert_many"
+    assert insert.serialize_time > 0 and insert.storage_time > 0
+    assert find_all.query == str((Shop.address.city == "x") & (Shop.name != "s1"))
+    assert (find_all.scanned, find_all.returned) == (10, len(shops)) == (10, 9)
+    assert find_all.validate_time > 0 and find_all.error is None
+    assert find_one.operation == "find_one" and find_one.returned == 1
+    assert "slow shop.find_all" in caplog.text
+    assert len(slow.entries) == 3
+
+    stats = metrics.snapshot()[("shop", "find_all")]
+    assert (stats.count, stats.scanned, stats.returned) == (1, 10, 9)
+    assert stats.buckets[-1] == 1
+    labels = 'collection="shop",operation="find_all"'
+    assert f"unqdantic_operation_seconds_count{{{labels}}} 1" in metrics.render()
+
+    database.remove_hook(events.append)
+    Shop.count()
+    assert len(events) == 3
@@ -0,0 +1,145 @@
+from typing import Any
+
+from tests.database import database
+from tests.models import Item, UserInfo
+from unqdantic import Document, in_, not_in
+from unqdantic.jx9 import compile_query
+
+
+def test_jx9_pushdown():
+    Item.save_all(
+        Item(name="apple", price=3, tags=["fruit"], info=UserInfo(money=10)),
+        Item(name="apricot", price=7.5, tags=["fruit", "dry"]),
+        Item(name="banana", price=2, note="yellow"),
+        Item(name="café", price=12, tags=[], info=UserInfo(money=300)),
+        Item(name="it's", price=0),
+    )
+    queries = [
+        Item.name == "apple",
+        Item.name != "apple",
+        Item.price == 7.5,
+        Item.price >= 3,
+        Item.price < 3,
+        Item.name > "b",
+        Item.name.startswith("ap"),
+        Item.name.endswith("é"),
+        Item.name == "it's",
+        Item.info.money == 300,
+        Item.name.__len__() == 4,
+        Item.tags.__len__() > 1,
+        in_(Item.name, ["apple", "banana"]),
+        not_in(Item.price, (2, 3.0)),
+        Item.note == None,  # noqa: E711
+        (Item.price > 5) | (Item.name == "banana"),
+        (Item.price > 1) & (Item.name.startswith("a")),
+    ]
+    for query in queries:
+        jx9_filter, residual = compile_query(query)
+        assert jx9_filter is not None, query
+        assert residual is None, query
+        expected = Item.collection.filter(query) or []
+        assert Item.collection.find(query) == expected, query
+        assert list(Item.collection.find_iter(query, batch_size=2)) == expected
+
+
+def test_find_iter():
+    items = Item.iter_all()
+    assert next(items).name == "apple"
+    assert [item.name for item in items] == ["apricot", "banana", "café", "it's"]
+    assert [item.id for item in Item.find_iter(Item.price > 2, batch_size=1)] == [
+        0,
+        1,
+        3,
+    ]
+
+
+def test_jx9_residual():
+    query = (Item.name.startswith("a")) & (Item.price + 1 > 5)
+    jx9_filter, residual = compile_query(query)
+    assert jx9_filter is not None
+    assert residual is not None
+    assert [item.name for item in Item.find_all(query)] == ["apricot"]
+    assert [item.name for item in Item.find_iter(query)] == ["apricot"]
+
+    jx9_filter, residual = compile_query(Item.price + 1 > 5)
+    assert jx9_filter is None
+    assert len(Item.find_all(Item.price + 1 > 5)) == 2
+
+
+def test_limit_skip():
+    assert [item.id for item in Item.find_all(limit=2)] == [0, 1]
+    assert [item.id for item in Item.find_all(skip=3)] == [3, 4]
+    assert [item.id for item in Item.find_all(Item.price >= 2, limit=2, skip=1)] == [
+        1,
+        2,
+    ]
+    assert [item.id for item in Item.find_all(Item.price + 1 > 3, skip=1)] == [1, 3]
+    assert Item.find_all(Item.price > 100, limit=1) == []
+    assert (item := Item.find_one(Item.price > 5)) and item.name == "apricot"
+    assert (item := Item.find_one()) and item.id == 0
+
+
+def test_projection():
+    only = [Item.name, Item.info.money, "info.missing"]
+    rows = Item.find_all(Item.price > 5, only=only)
+    assert rows == [
+        {"id": 1, "name": "apricot", "info": {"money": 200, "missing": None}},
+        {"id": 3, "name": "café", "info": {"money": 300, "missing": None}},
+    ]
+    assert Item.find_all(Item.price + 0 > 5, only=only) == rows
+    assert Item.find_all(Item.price + 0 > 5, Item.price > 5, only=only) == rows
+    assert Item.find_all(Item.price > 5, only=only, limit=1, skip=1) == rows[1:]
+    assert Item.find_all(only=[Item.info, Item.info.money])[0] == {
+        "id": 0,
+        "info": {"money": 10, "birthday": Item.get_by_id(0).info.birthday.isoformat()},
+    }
+    assert len(Item.find_all(only=[Item.name])) == 5
+
+
+def test_order_by():
+    def names(items):
+        return [item.name for item in items]
+
+    assert names(Item.find_all(order_by=-Item.price, limit=2)) == ["café", "apricot"]
+    assert names(Item.find_all(order_by=Item.price)) == [
+        "it's",
+        "banana",
+        "apple",
+        "apricot",
+        "café",
+    ]
+    assert names(Item.find_all(Item.price > 2, order_by="-name", skip=1)) == [
+        "apricot",
+        "apple",
+    ]
+    assert names(Item.find_all(order_by=[-Item.info.money, Item.name], limit=3)) == [
+        "café",
+        "apricot",
+        "banana",
+    ]
+    assert Item.find_all(order_by=-Item.price, limit=1, only=[Item.name]) == [
+        {"id": 3, "name": "café"},
+    ]
+
+
+class Flag(Document):
+    value: Any = None
+    indexed: Any = None
+
+    class Meta:
+        db = database
+        name = "flag"
+        indexes = ("indexed",)
+
+
+def test_bool_int_semantics():
+    """Pushed down, indexed and Python evaluation agree, as `True == 1` in Python."""
+    values = [True, False, 1, 0, 1.0, 2]
+    Flag.insert_many([Flag(value=v, indexed=v) for v in values])
+    for field in (Flag.value, Flag.indexed):
+        queries = [field == c for c in (True, False, 1, 0, 1.0, 2)]
+        queries += [field != True, field > 0, field <= 1, field < True]  # noqa: E712
+        queries += [in_(field, [1]), in_(field, [True, 2]), not_in(field, [0])]
+        for query in queries:
+            expected = [r for r in Flag.collection.all() if query(r)]
+            assert Flag.collection.find(query) == expected, query
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+from unqdantic import BinaryCodec, Database, Document, JSONCodec
+
+from pydantic import BaseModel
+import pytest
+
+
+class Session(BaseModel):
+    user: str
+    scopes: list = []
+
+
+class Note(Document):
+    text: str
+
+    class Meta:
+        db = None
+        name = "note"
+
+
+def test_batched_keys():
+    db = Database(":mem:")
+    db.mset({"a": "1", "b": b"2"})
+    assert db.mget(["a", "missing", "b"]) == [b"1", None, b"2"]
+    assert db.mdelete(["a", "missing", "a"]) == 1
+    assert "a" not in db and db["b"] == b"2"
+
+
+def test_mset_is_atomic(tmp_path: Path):
+    path = tmp_path / "kv.db"
+    path.touch()
+    db = Database(path)
+    db.mset({"a": "1"})
+    try:
+        with db.atomic():
+            db.mset({"a": "2", "b": "3"})
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert db.mget(["a", "b"]) == [b"1", None]
+
+
+def test_namespace():
+    db = Database(":mem:", documents=[Note])
+    Note(text="x").insert()
+    sessions = db.namespace(Session, prefix="session:")
+    other = db.namespace(Session, codec=JSONCodec(trusted=True))
+    sessions["s1"] = Session(user="a", scopes=["read"])
+    sessions.mset({"s2": Session(user="b"), "s3": Session(user="c")})
+    other["s1"] = Session(user="z")
+
+    assert sessions["s1"] == Session(user="a", scopes=["read"])
+    assert db["session:s2"] == b'{"user":"b","scopes":[]}'
+    assert [s and s.user for s in sessions.mget(["s3", "s9", "s2"])] == [
+        "c",
+        None,
+        "b",
+    ]
+    assert other.fetch("s1") == Session(user="z") and other.fetch("s2") is None
+    assert sorted(sessions.keys()) == ["s1", "s2", "s3"]
+    assert sessions.delete("s1") and not sessions.delete("s1")
+    assert sessions.mdelete(["s2", "s3"]) == 2
+    assert "s2" not in sessions and list(other.keys()) == ["s1"]
+
+
+class Profile(BaseModel):
+    name: str
+    session: Session
+    tags: dict = {}
+
+
+def test_binary_codec_reads_json():
+    db = Database(":mem:", codec=BinaryCodec())
+    profiles = db.namespace(Profile)
+    profile = Profile(name="a", session=Session(user="u", scopes=[1]), tags={"x": 1.5})
+    db.namespace(Profile, codec=JSONCodec())["old"] = profile
+    profiles["new"] = profile
+
+    assert db["Profile:new"].startswith(b"\x00P")
+    assert len(db["Profile:new"]) < len(db["Profile:old"])
+    assert profiles.mget(["old", "new"]) == [profile, profile]
+    assert BinaryCodec(trusted=True).decode(db["Profile:new"], Profile) == profile
+
+    class Renamed(BaseModel):
+        title: str
+
+    with pytest.raises(ValueError):
+        profiles.codec.decode(db["Profile:new"], Renamed)
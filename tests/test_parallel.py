@@ -0,0 +1,84 @@
+from unqdantic import Database, Document
+from unqdantic.parallel import _find_range, partition, scan_ranges
+
+import pytest
+
+
+def test_partition():
+    assert partition(9, 3) == [(0, 4), (4, 8), (8, 10)]
+    assert partition(0, 4) == [(0, 1)]
+    assert partition(2, 8) == [(0, 1), (1, 2), (2, 3)]
+
+
+def test_parallel_scan(tmp_path):
+    path = tmp_path / "parallel.db"
+    path.touch()
+    database = Database(path)
+
+    class Sale(Document):
+        shop: str
+        amount: float
+        note: str = ""
+
+        class Meta:
+            db = database
+            name = "sale"
+
+    Sale.insert_many(
+        [Sale(shop=f"s{i % 3}", amount=i, note="x" * (i % 4)) for i in range(100)],
+    )
+    Sale.delete_by_id(10)
+    query = (Sale.amount >= 20) & Sale.note.endswith("x")
+
+    for filter in [(), (query,), ((Sale.amount + 1) > 50,)]:
+        expected = Sale.find_all(*filter)
+        assert Sale.find_all(*filter, processes=2) == expected
+        assert Sale.find_all(*filter, processes=2, limit=5, skip=3) == expected[3:8]
+
+    assert Sale.count(processes=2) == 99
+    assert Sale.sum(Sale.amount, query, processes=2) == Sale.sum(Sale.amount, query)
+    assert Sale.max(Sale.amount, Sale.shop == "s1", processes=2) == 97
+    assert Sale.group_by(
+        Sale.shop,
+        aggregate="avg",
+        field=Sale.amount,
+        processes=2,
+    ) == Sale.group_by(Sale.shop, aggregate="avg", field=Sale.amount)
+    assert Sale.find_all(
+        order_by=-Sale.amount,
+        only=[Sale.amount],
+        limit=2,
+        processes=2,
+    ) == [{"id": 99, "amount": 99}, {"id": 98, "amount": 98}]
+    database.close()
+
+
+def test_parallel_scan_needs_file():
+    database = Database(":mem:")
+    collection = database.collection("memory")
+    with pytest.raises(ValueError):
+        collection.find(None, processes=2)
+
+
+def test_parallel_scan_in_transaction(tmp_path):
+    path = tmp_path / "parallel.db"
+    path.touch()
+    database = Database(path)
+    collection = database.collection("rows")
+    collection.create()
+    collection.store({"n": 1})
+
+    with pytest.raises(RuntimeError), database.atomic():
+        collection.store({"n": 2})
+        assert len(collection.find(None, processes=2)) == 2
+        with pytest.raises(ValueError):
+            scan_ranges(collection, _find_range, 2, None, None)
+        raise RuntimeError
+    assert len(collection.find(None, processes=2)) == 1
+
+    database.disable_autocommit()
+    collection.store({"n": 3})
+    assert collection.explain(None, processes=2).access == "all"
+    database.rollback()
+    assert len(collection.find(None)) == 1
+    database.close()
@@ -0,0 +1,56 @@
+from tests.models import Item
+from unqdantic import in_, is_, not_in
+from unqdantic.jx9 import compile_query
+from unqdantic.plan import plan_query, query_shape
+
+RECORDS = [
+    {"name": "apple", "price": 3, "tags": ["fruit"], "info": {"money": 10}},
+    {"name": "banana", "price": 2.5, "tags": [], "note": None},
+    {"name": "kiwi", "price": None, "info": "broken"},
+    {},
+]
+
+
+def test_predicate_matches_query():
+    queries = [
+        Item.name == "apple",
+        Item.price >= 2.5,
+        Item.info.money == 10,
+        Item.name.__len__() == 4,
+        Item.name.startswith("b"),
+        in_(Item.name, ["kiwi", "apple"]),
+        not_in(Item.price, (2.5, None)),
+        is_(Item.note, None),
+        Item.name + "" == "kiwi",
+        (Item.name == "apple") | (Item.tags == []),
+        (Item.name != "x") & (Item.name + "!" == "apple!") & (Item.info == "broken"),
+    ]
+    for query in queries:
+        predicate = plan_query(query).predicate
+        for record in RECORDS:
+            try:
+                expected = query(record)
+            except (AttributeError, TypeError):
+                continue
+            assert predicate(record) == expected, (query, record)
+
+
+def test_plan_is_shared_by_shape():
+    first, second = Item.price > 1, Item.price > 5
+    assert query_shape(first)[0] == query_shape(second)[0]
+    assert query_shape(first)[0] != query_shape(Item.price > "1")[0]
+    assert query_shape(is_(Item.note, True))[0] != query_shape(is_(Item.note, False))[0]
+
+    for query in (
+        (Item.name == "apple") & (Item.name + "" == "apple") & (Item.price > 1),
+        (Item.name == "pear") & (Item.name + "" == "pear") & (Item.price > 0),
+        in_(Item.name, ("a", 1, True, None)),
+        in_(Item.name, ("b", 2, False, None)),
+    ):
+        bound = plan_query(query)
+        jx9_filter, residual = compile_query(query)
+        assert bound.jx9_filter == jx9_filter
+        assert (bound.residual is None) == (residual is None)
+        if residual is not None:
+            for record in RECORDS[:2]:
+                assert bound.residual(record) == residual(record)
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from unqdantic import Database, Document
+from unqdantic.lock import RWLock
+
+shared_database = Database(":mem:", thread_safe=True)
+
+
+class Counter(Document):
+    name: str
+    value: int = 0
+
+    class Meta:
+        db = shared_database
+        name = "counter"
+        indexes = ["name"]
+
+
+def test_concurrent_reads_and_writes():
+    Counter.insert_many([Counter(name=f"c{i}") for i in range(50)])
+
+    def write(worker: int) -> None:
+        for i in range(20):
+            Counter(name=f"w{worker}-{i}", value=i).save()
+
+    def read(worker: int) -> int:
+        total = 0
+        for _ in range(20):
+            assert len(Counter.find_all(Counter.name == f"c{worker}")) == 1
+            total += sum(1 for _ in Counter.find_iter(batch_size=7))
+        return total
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        writes = [executor.submit(write, worker) for worker in range(4)]
+        reads = [executor.submit(read, worker) for worker in range(4)]
+        for future in writes + reads:
+            future.result()
+
+    assert Counter.count() == 50 + 4 * 20
+    assert len(Counter.find_all(Counter.name.startswith("w1-"))) == 20
+
+
+def test_rwlock_writer_excludes_readers():
+    lock = RWLock()
+    events = []
+    reading = threading.Event()
+
+    def reader() -> None:
+        with lock.read():
+            reading.set()
+            events.append("read")
+
+    with lock.write():
+        with lock.read():
+            events.append("nested")
+        thread = threading.Thread(target=reader)
+        thread.start()
+        assert not reading.wait(0.05)
+        events.append("write")
+    thread.join()
+    assert events == ["nested", "write", "read"]
+
+
+def test_documents_bound_per_database():
+    class Note(Document):
+        text: str
+
+    first = Database(":mem:", documents=[Note])
+    Note(text="first").save()
+    second = Database(":mem:", documents=[Note])
+    assert Note.meta.db is second and Note.count() == 0
+    assert len(first.collection("Note")) == 1
@@ -0,0 +1,112 @@
+from unqdantic import Database, Document
+
+import pytest
+
+
+@pytest.fixture()
+def database(tmp_path):
+    path = tmp_path / "transaction.db"
+    path.touch()
+    database = Database(path)
+    yield database
+    database.close()
+
+
+def make_model(database: Database):
+    class Entry(Document):
+        key: str
+        value: int = 0
+
+        class Meta:
+            db = database
+            name = "entry"
+            indexes = ["key"]
+
+    return Entry
+
+
+def test_atomic_savepoints(database):
+    Entry = make_model(database)
+    Entry(key="before").insert()
+
+    with database.atomic():
+        Entry(key="outer").insert()
+        with pytest.raises(RuntimeError), database.atomic():
+            Entry(key="inner").insert()
+            Entry.update_many(Entry.key == "outer", set={Entry.value: 1})
+            raise RuntimeError
+        with database.atomic():
+            Entry(key="kept").insert()
+        assert Entry.count(Entry.key == "inner") == 0
+
+    keys = [entry.key for entry in Entry.all()]
+    assert keys == ["before", "outer", "kept"]
+    assert Entry.find_one(Entry.key == "outer").value == 0
+    assert [entry.key for entry in Entry.find_all(Entry.key > "c")] == ["outer", "kept"]
+
+    with pytest.raises(RuntimeError), database.atomic():
+        Entry(key="lost").insert()
+        raise RuntimeError
+    assert Entry.count() == 3
+
+
+def test_transaction_joins(database):
+    Entry = make_model(database)
+    with database.transaction():
+        Entry(key="a").insert()
+        with pytest.raises(RuntimeError), database.transaction():
+            Entry(key="b").insert()
+            raise RuntimeError
+    assert Entry.count() == 2
+
+
+def test_transaction_journal(database):
+    Entry = make_model(database)
+    with database.transaction():
+        Entry.insert_many([Entry(key=str(i)) for i in range(10)])
+        assert database._journal == []
+        with pytest.raises(RuntimeError), database.atomic():
+            Entry(key="joined").insert()
+            raise RuntimeError
+    assert Entry.count() == 11
+
+    with database.transaction():
+        with pytest.raises(RuntimeError), database.atomic():
+            Entry(key="undone").insert()
+            raise RuntimeError
+        Entry(key="kept").insert()
+    assert Entry.count(Entry.key == "undone") == 0
+    assert Entry.count() == 12
+    assert database._journal == []
+
+
+def test_batch(database):
+    Entry = make_model(database)
+    with database.batch(size=10) as batch:
+        for i in range(25):
+            database.store(f"k{i}", i)
+        assert (batch.commits, batch.pending) == (2, 5)
+        with database.atomic():
+            Entry(key="x").insert()
+        assert batch.pending == 0
+    assert database._dirty is False
+    assert database.fetch("k24") == b"24"
+
+
+def test_atomic_in_memory_keeps_writes():
+    database = Database(":mem:")
+    Entry = make_model(database)
+    assert not database.supports_rollback
+
+    with database.atomic():
+        Entry(key="x").insert()
+        with pytest.raises(RuntimeError), database.atomic():
+            Entry(key="y").insert()
+            raise RuntimeError
+        Entry(key="z").insert()
+    with pytest.raises(RuntimeError), database.atomic():
+        Entry(key="w").insert()
+        raise RuntimeError
+
+    assert [entry.key for entry in Entry.all()] == ["x", "y", "z", "w"]
+    assert Entry.find_one(Entry.key == "w") is not None
@@ -0,0 +1,138 @@
+from typing import List
+
+from tests.database import database
+from tests.models import UserInfo
+from unqdantic import Collection, Document
+
+from pydantic import Field
+import pytest
+
+
+class Profile(Document):
+    name: str
+    tags: List[str] = Field(default_factory=list)
+    info: UserInfo = Field(default_factory=UserInfo)
+
+    class Meta:
+        db = database
+        name = "profile"
+        indexes = ("name",)
+
+
+def test_skip_unchanged_writes(monkeypatch):
+    profile = Profile(name="a").insert()
+    writes = []
+    update = Collection.update
+    monkeypatch.setattr(
+        Collection,
+        "update",
+        lambda self, *args: writes.append(args[0]) or update(self, *args),
+    )
+
+    assert profile.update()
+    assert profile.save() is profile
+    assert Profile.get_by_id(profile.id).update(name="a")
+    assert writes == []
+
+    profile.tags.append("x")
+    profile.save()
+    profile.info.money = 50
+    profile.save()
+    assert profile.update(fields={Profile.info.money: 60, "name": "b"})
+    assert writes == [profile.id] * 3
+
+    stored = Profile.get_by_id(profile.id)
+    assert (stored.name, stored.tags, stored.info.money) == ("b", ["x"], 60)
+    assert Profile.find_one(Profile.name == "b").id == profile.id
+    assert Profile.find_one(Profile.name == "a") is None
+
+
+class Contact(Document):
+    email: str
+    name: str = ""
+    info: UserInfo = Field(default_factory=UserInfo)
+
+    class Meta:
+        db = database
+        name = "contact"
+
+
+def test_upsert():
+    contact = Contact(email="a@x.com", name="a").upsert(Contact.email == "a@x.com")
+    assert contact.id == 0
+    again = Contact(email="a@x.com", name="b").upsert(Contact.email == "a@x.com")
+    assert again.id == 0
+    assert Contact.count() == 1
+    assert Contact.get_by_id(0).name == "b"
+    with pytest.raises(TypeError):
+        Contact(email="c@x.com").upsert()
+    with pytest.raises(TypeError):
+        Contact.get_or_create()
+
+    created = Contact.get_or_create(Contact.email == "b@x.com", defaults={"name": "b"})
+    assert (created.id, created.name) == (1, "b")
+    assert Contact.get_or_create(Contact.email == "b@x.com").id == 1
+
+    updated = Contact.update_or_create(
+        Contact.email == "a@x.com",
+        defaults={Contact.info.money: 50, Contact.name: "c"},
+    )
+    assert (updated.id, updated.name, updated.info.money) == (0, "c", 50)
+    stored = Contact.get_by_id(0)
+    assert (stored.name, stored.info.money) == ("c", 50)
+    assert stored.info.birthday == contact.info.birthday
+    assert Contact.count() == 2
+
+
+def test_upsert_many():
+    for model, key in ((Contact, Contact.email), (Profile, Profile.name)):
+        model.clear()
+        model.insert_many([model(**{key.path[-1]: f"{i}"}) for i in range(3)])
+        documents = [
+            model(**{key.path[-1]: "1"}),
+            model(**{key.path[-1]: "5"}),
+            model(**{key.path[-1]: "2", "info": UserInfo(money=1)}),
+            model(**{key.path[-1]: "5", "info": UserInfo(money=2)}),
+        ]
+        result = model.upsert_many(documents, key=key)
+        assert result.ids == [1, 3, 2, 3]
+        assert [doc.id for doc in documents] == result.ids
+        assert (result.inserted, result.updated, result.unchanged) == (1, 1, 2)
+        assert model.count() == 4
+        assert model.get_by_id(2).info.money == 1
+        assert model.get_by_id(3).info.money == 2
+
+
+def test_update_reads_only_when_needed(monkeypatch):
+    contact = Contact(email="r@x.com").insert()
+    reads = []
+    fetch = Collection.fetch
+    monkeypatch.setattr(
+        Collection,
+        "fetch",
+        lambda self, id: reads.append(id) or fetch(self, id),
+    )
+
+    assert contact.update(name="r")
+    contact.email = "s@x.com"
+    assert contact.update()
+    assert reads == []
+    contact.info.money = 10
+    assert contact.update()
+    assert contact.update(name="r")
+    assert reads == [contact.id] * 2
+
+    stored = Contact.get_by_id(contact.id)
+    assert (stored.email, stored.name, stored.info.money) == ("s@x.com", "r", 10)
+
+
+def test_update_many_validates():
+    Profile.clear()
+    Profile(name="v").insert()
+    assert Profile.update_many(Profile.name == "v", set={Profile.info.money: "2.5"})
+    assert Profile.collection.fetch(0)["info"]["money"] == 2.5
+    with pytest.raises(ValueError):
+        Profile.update_many(Profile.name == "v", set={"info.unknown": 1})
+    with pytest.raises(ValueError):
+        Profile.update_many(Profile.name == "v", set={"tags.0": "x"})
+    assert Profile.get_by_id(0).info.money == 2.5
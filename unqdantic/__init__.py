@@ -1,8 +1,26 @@
+from .cache import IdentityMap as IdentityMap
+from .codecs import (
+    BinaryCodec as BinaryCodec,
+    Codec as Codec,
+    JSONCodec as JSONCodec,
+)
 from .core import (
+    BulkResult as BulkResult,
     Collection as Collection,
     Database as Database,
+    UpsertResult as UpsertResult,
 )
 from .expression import *
+from .instrument import (
+    Metrics as Metrics,
+    OperationEvent as OperationEvent,
+    SlowQueryLog as SlowQueryLog,
+)
+from .kv import KeyValueStore as KeyValueStore
 from .meta import MetaConfig as MetaConfig
 from .models import Document as Document
+from .transaction import (
+    Atomic as Atomic,
+    WriteBatch as WriteBatch,
+)
 from .types import UnqliteOpenFlag as UnqliteOpenFlag
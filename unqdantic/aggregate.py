@@ -0,0 +1,101 @@
+from typing import Any, Dict, Iterable, Literal, Optional, Union
+
+AggregateFunc = Literal["count", "sum", "min", "max", "avg"]
+
+Number = Union[int, float]
+
+
+class Stats:
+    """Count of the matched records and numeric aggregates of one field.
+
+    Only int and float values take part in `sum`, `min`, `max` and `avg`,
+    missing fields, `None` and every other type are skipped.
+    """
+
+    __slots__ = ("count", "numeric", "total", "minimum", "maximum")
+
+    def __init__(
+        self,
+        count: int = 0,
+        numeric: int = 0,
+        total: Number = 0,
+        minimum: Optional[Number] = None,
+        maximum: Optional[Number] = None,
+    ) -> None:
+        self.count = count
+        self.numeric = numeric
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def __repr__(self) -> str:
+        return (
+            f"Stats(count={self.count}, numeric={self.numeric}, total={self.total},"
+            f" minimum={self.minimum}, maximum={self.maximum})"
+        )
+
+    def add(self, value: Any) -> None:
+        self.count += 1
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self.numeric += 1
+            self.total += value
+            if self.minimum is None or value < self.minimum:
+                self.minimum = value
+            if self.maximum is None or value > self.maximum:
+                self.maximum = value
+
+    def merge(self, other: "Stats") -> "Stats":
+        self.count += other.count
+        self.numeric += other.numeric
+        self.total += other.total
+        if other.minimum is not None and (
+            self.minimum is None or other.minimum < self.minimum
+        ):
+            self.minimum = other.minimum
+        if other.maximum is not None and (
+            self.maximum is None or other.maximum > self.maximum
+        ):
+            self.maximum = other.maximum
+        return self
+
+    def result(self, func: AggregateFunc) -> Any:
+        if func == "count":
+            return self.count
+        if func == "sum":
+            return self.total
+        if func == "min":
+            return self.minimum
+        if func == "max":
+            return self.maximum
+        if func == "avg":
+            return self.total / self.numeric if self.numeric else None
+        raise ValueError(f"不支持的聚合函数 {func}")
+
+    @classmethod
+    def from_values(cls, values: Iterable[Any]) -> "Stats":
+        stats = cls()
+        for value in values:
+            stats.add(value)
+        return stats
+
+
+def hashable(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, hashable(v)) for k, v in value.items()))
+    return value
+
+
+def group_stats(
+    rows: Iterable[Any],
+    key: Any,
+    value: Any,
+) -> Dict[Any, Stats]:
+    groups: Dict[Any, Stats] = {}
+    for row in rows:
+        group = hashable(key(row))
+        if group not in groups:
+            groups[group] = Stats()
+        groups[group].add(value(row))
+    return groups
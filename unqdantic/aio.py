@@ -0,0 +1,215 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import partial
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterator,
+    Optional,
+    Type,
+    TYPE_CHECKING,
+    TypeVar,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from .core import Database
+    from .expression import Query
+    from .models import Document
+
+T = TypeVar("T")
+
+WRITE_METHODS = frozenset(
+    {
+        "insert",
+        "update",
+        "save",
+        "delete",
+        "upsert",
+        "save_all",
+        "insert_many",
+        "upsert_many",
+        "update_many",
+        "delete_many",
+        "delete_by_id",
+        "clear",
+        "get_or_create",
+        "update_or_create",
+        "bulk_save_from_dict",
+        "store",
+        "append",
+        "mset",
+        "mdelete",
+        "begin",
+        "commit",
+        "rollback",
+    },
+)
+"""Methods that take the write lock of the database."""
+
+_in_transaction: ContextVar[Optional["AsyncDatabase"]] = ContextVar(
+    "unqdantic_in_transaction",
+    default=None,
+)
+
+
+class AsyncDatabase:
+    """Asyncio facade of a `Database`.
+
+    Every operation runs on a single worker thread owned by the database, so
+    the UnQLite handle is only ever used from that thread and the event loop
+    is never blocked. Writes and `transaction()` blocks additionally hold an
+    `asyncio.Lock`, so a transaction is not interleaved with writes of other
+    tasks. Reads are not blocked by an open transaction and may see its
+    uncommitted changes.
+    """
+
+    def __init__(self, database: "Database") -> None:
+        self.database = database
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def __repr__(self) -> str:
+        return f"AsyncDatabase(filename={self.database.filename})"
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="unqdantic",
+            )
+        return self._executor
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `func` on the worker thread of the database."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def write(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `func` on the worker thread while holding the write lock."""
+        if _in_transaction.get() is self:
+            return await self.run(func, *args, **kwargs)
+        async with self.lock:
+            return await self.run(func, *args, **kwargs)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["AsyncDatabase"]:
+        if _in_transaction.get() is self:
+            yield self
+            return
+        async with self.lock:
+            token = _in_transaction.set(self)
+            atomic = self.database.atomic()
+            try:
+                await self.run(atomic.__enter__)
+                try:
+                    yield self
+                except BaseException as e:
+                    await self.run(atomic.__exit__, type(e), e, e.__traceback__)
+                    raise
+                await self.run(atomic.__exit__, None, None, None)
+            finally:
+                _in_transaction.reset(token)
+
+    async def iterate(
+        self,
+        factory: Callable[[], Iterator[T]],
+        batch_size: int = 1000,
+    ) -> AsyncIterator[T]:
+        """Stream the items of the iterator built by `factory`.
+
+        The iterator is advanced on the worker thread `batch_size` items at a
+        time, so other operations can run between two batches of a long scan.
+        """
+        batch_size = max(batch_size, 1)
+        iterator = await self.run(factory)
+        while True:
+            batch = await self.run(lambda: list(islice(iterator, batch_size)))
+            for item in batch:
+                yield item
+            if len(batch) < batch_size:
+                return
+
+    async def close(self) -> bool:
+        result = await self.write(self.database.close)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        return result
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        method = getattr(self.database, name)
+        run = self.write if name in WRITE_METHODS else self.run
+        return partial(run, method)
+
+
+class _AsyncProxy:
+    target: Any
+
+    @property
+    def _database(self) -> AsyncDatabase:
+        collection = self.target.collection
+        if collection is None:
+            raise ValueError(f"文档 {self.target.meta.name} 未绑定数据库")
+        return collection.db.aio
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        method = getattr(self.target, name)
+        if not callable(method):
+            raise AttributeError(name)
+        database = self._database
+        run = database.write if name in WRITE_METHODS else database.run
+        return partial(run, method)
+
+
+class AsyncModel(_AsyncProxy):
+    """Asyncio facade of the class methods of a `Document` model."""
+
+    def __init__(self, model: Type["Document"]) -> None:
+        self.target = model
+
+    def __repr__(self) -> str:
+        return f"AsyncModel({self.target.__name__})"
+
+    def find_iter(
+        self,
+        *filter: Union["Query", bool],
+        batch_size: int = 1000,
+        trusted: Optional[bool] = None,
+    ) -> AsyncIterator["Document"]:
+        return self._database.iterate(
+            lambda: self.target.find_iter(
+                *filter,
+                batch_size=batch_size,
+                trusted=trusted,
+            ),
+            batch_size,
+        )
+
+    def iter_all(
+        self,
+        batch_size: int = 1000,
+        trusted: Optional[bool] = None,
+    ) -> AsyncIterator["Document"]:
+        return self.find_iter(batch_size=batch_size, trusted=trusted)
+
+
+class AsyncInstance(_AsyncProxy):
+    """Asyncio facade of the methods of a `Document` instance."""
+
+    def __init__(self, document: "Document") -> None:
+        self.target = document
+
+    def __repr__(self) -> str:
+        return f"AsyncInstance({self.target!r})"
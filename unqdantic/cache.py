@@ -0,0 +1,73 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Hashable, Optional, Tuple
+
+
+class IdentityMap:
+    """LRU map of `(collection, id)` to the documents loaded by `get_by_id`.
+
+    Entries are dropped by the write paths of `Collection`, so a cached
+    document stays the same object until its record changes. Writes made
+    outside of unqdantic are not seen, `ttl` bounds how stale an entry can be.
+    """
+
+    def __init__(self, size: int, ttl: Optional[float] = None) -> None:
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"IdentityMap(size={self.size}, ttl={self.ttl}, hits={self.hits},"
+            f" misses={self.misses}, evictions={self.evictions})"
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, collection: str, id: int) -> Optional[Any]:
+        with self._lock:
+            return self._get(collection, id)
+
+    def _get(self, collection: str, id: int) -> Optional[Any]:
+        entry = self._entries.get((collection, id))
+        if entry is None or (
+            self.ttl is not None and time.monotonic() - entry[0] > self.ttl
+        ):
+            if entry is not None:
+                del self._entries[(collection, id)]
+            self.misses += 1
+            return None
+        self._entries.move_to_end((collection, id))
+        self.hits += 1
+        return entry[1]
+
+    def put(self, collection: str, id: int, value: Any) -> None:
+        with self._lock:
+            self._entries[(collection, id)] = (time.monotonic(), value)
+            self._entries.move_to_end((collection, id))
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, collection: str, id: int) -> None:
+        with self._lock:
+            self._entries.pop((collection, id), None)
+
+    def clear(self, collection: Optional[str] = None) -> None:
+        with self._lock:
+            if collection is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == collection]:
+                del self._entries[key]
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,103 @@
+from functools import lru_cache
+import json
+import marshal
+from typing import Any, FrozenSet, Protocol, Tuple, Type, TypeVar
+import zlib
+
+from .decoders import construct_document
+from .encoders import encode_document
+
+from pydantic.main import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+MARSHAL_VERSION = 4
+POSITIONAL = b"\x00P"
+"""Header of binary values stored by field position; JSON never starts with NUL."""
+PLAIN = b"\x00M"
+"""Header of binary values that do not fit the field layout of their model."""
+
+
+class Codec(Protocol):
+    """Conversion of models to the bytes stored as key-value values."""
+
+    def encode(self, model: BaseModel) -> bytes:
+        ...
+
+    def decode(self, data: bytes, model: Type[ModelT]) -> ModelT:
+        ...
+
+
+class JSONCodec:
+    """Models as compact JSON, like the records of the collections.
+
+    With `trusted` the stored values are not validated again on decode, see
+    `construct_document`; values that do not match the model still are.
+    """
+
+    def __init__(self, by_alias: bool = False, trusted: bool = False) -> None:
+        self.by_alias = by_alias
+        self.trusted = trusted
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(by_alias={self.by_alias}, trusted={self.trusted})"
+        )
+
+    def encode(self, model: BaseModel) -> bytes:
+        data = encode_document(model, self.by_alias)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def decode(self, data: bytes, model: Type[ModelT]) -> ModelT:
+        return self.build(json.loads(data), model)
+
+    def build(self, values: Any, model: Type[ModelT]) -> ModelT:
+        if self.trusted and isinstance(values, dict):
+            instance = construct_document(model, values, self.by_alias)
+            if instance is not None:
+                return instance
+        return model.parse_obj(values)
+
+
+@lru_cache(maxsize=None)
+def _layout(
+    model: Type[BaseModel],
+    by_alias: bool,
+) -> Tuple[Tuple[str, ...], FrozenSet[str], bytes]:
+    """Storage keys of the fields in order, as a set, and their fingerprint."""
+    keys = tuple(
+        field.alias if by_alias else name for name, field in model.__fields__.items()
+    )
+    fingerprint = zlib.crc32("\0".join(keys).encode()).to_bytes(4, "big")
+    return keys, frozenset(keys), fingerprint
+
+
+class BinaryCodec(JSONCodec):
+    """Models as `marshal` data laid out by the position of their fields.
+
+    The field names are replaced by a 4 byte fingerprint of the layout, nested
+    values are kept as they are encoded for JSON. Values stored as JSON, e.g.
+    before switching a namespace to this codec, are still decoded. A value
+    written for another field layout of the model cannot be decoded and
+    raises `ValueError`; like `marshal` itself this is not meant for data from
+    untrusted sources.
+    """
+
+    def encode(self, model: BaseModel) -> bytes:
+        data = encode_document(model, self.by_alias)
+        keys, key_set, fingerprint = _layout(type(model), self.by_alias)
+        if isinstance(data, dict) and data.keys() == key_set:
+            values = tuple([data[key] for key in keys])
+            return POSITIONAL + fingerprint + marshal.dumps(values, MARSHAL_VERSION)
+        return PLAIN + marshal.dumps(data, MARSHAL_VERSION)
+
+    def decode(self, data: bytes, model: Type[ModelT]) -> ModelT:
+        header = data[:2]
+        if header == POSITIONAL:
+            keys, _, fingerprint = _layout(model, self.by_alias)
+            if data[2:6] != fingerprint:
+                raise ValueError(f"数据的字段布局与模型 {model.__name__} 不一致")
+            return self.build(dict(zip(keys, marshal.loads(data[6:]))), model)
+        if header == PLAIN:
+            return self.build(marshal.loads(data[2:]), model)
+        return super().decode(data, model)
@@ -1,5 +1,11 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import partial
+import heapq
+from itertools import islice
 from pathlib import Path
+import time
 from typing import (
     Any,
     Callable,
@@ -9,12 +15,15 @@ from typing import (
     Iterator,
     List,
     Literal,
+    Mapping,
     Optional,
     overload,
+    Sequence,
     Set,
     Tuple,
     Type,
     TYPE_CHECKING,
+    TypeVar,
     Union,
 )
 from typing_extensions import Self
@@ -22,74 +31,524 @@ from typing_extensions import Self
 import unqlite
 
 if TYPE_CHECKING:
+    from .expression import Query
     from .models import Document
+from .aggregate import group_stats, hashable, Stats
+from .aio import AsyncDatabase
+from .cache import IdentityMap
+from .codecs import Codec, JSONCodec
+from .index import _MISSING, Index, normalize_value, plan_index_lookup
+from .instrument import emit, Hook, OperationEvent, scanned, timer, tracking
+from .jx9 import (
+    compile_projection,
+    Jx9Filter,
+    UPDATE_SCRIPT,
+)
+from .kv import KeyValueStore
+from .lock import NullLock, reading, RWLock, writing
+from .parallel import (
+    committable,
+    parallel_find,
+    parallel_group_stats,
+    parallel_stats,
+)
+from .plan import Explanation, plan_query
+from .transaction import Atomic, WriteBatch
 from .types import UnqliteOpenFlag
+from .utils import (
+    normalize_paths,
+    project_dict,
+    record_sort_key,
+    recursively_get_item,
+    recursively_set_item,
+    same_record,
+)
+
+from pydantic.main import BaseModel
+
+T = TypeVar("T")
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+@dataclass
+class BulkResult:
+    """Ids of the records written by a bulk insert, in input order."""
+
+    ids: List[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def throughput(self) -> float:
+        """Records written per second."""
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class UpsertResult(BulkResult):
+    """Ids of the upserted records in input order, with how they were written."""
+
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def unchanged(self) -> int:
+        return self.count - self.inserted - self.updated
 
 
 class Collection:
     def __init__(self, db: "Database", name: str) -> None:
         self.collection: unqlite.Collection = db.db.collection(name)
-        if not self.collection.exists():
-            self.collection.create()
         self.db: Database = db
+        if not self.collection.exists():
+            db._apply(self.collection.create)
         self.name: str = name
+        self.indexes: Dict[str, Index] = {}
 
     def __repr__(self) -> str:
         return f"Collection(name={self.name})"
 
+    @property
+    def lock(self) -> Union[RWLock, NullLock]:
+        return self.db.lock
+
+    @reading
     def all(self) -> List[Dict[str, Any]]:
-        return self.collection.all()
+        with timer("storage_time"):
+            data = self.collection.all()
+        scanned(len(data))
+        return data
 
     def __iter__(self) -> Iterator[Dict[str, Any]]:
-        return self.collection.__iter__()
+        return self.scan_jx9(Jx9Filter("TRUE"))
 
     def __next__(self) -> Dict[str, Any]:
+        """Advance the cursor shared by the collection, not thread-safe."""
         return self.collection.__next__()
 
+    @reading
     def __len__(self) -> int:
         return self.collection.__len__()
 
+    @reading
     def filter(
         self,
         filter_fn: Callable[[Dict[str, Any]], bool],
     ) -> Optional[List[Dict[str, Any]]]:
-        return self.collection.filter(filter_fn)
+        if tracking():
+            scanned(self.collection.__len__())
+        with timer("storage_time", exclude="filter_time"):
+            return self.collection.filter(filter_fn)
+
+    @reading
+    def filter_jx9(self, jx9_filter: Jx9Filter) -> List[Dict[str, Any]]:
+        if tracking():
+            scanned(self.collection.__len__())
+        with timer("storage_time"), self.db.vm(jx9_filter.script) as vm:
+            vm["collection"] = self.name
+            vm.set_values(jx9_filter.params)
+            vm.execute()
+            return vm["data"] or []
+
+    @writing
+    def create_index(self, path: str) -> Index:
+        if path not in self.indexes:
+            index = Index(self, path)
+            index.ensure()
+            self.indexes[path] = index
+        return self.indexes[path]
+
+    @reading
+    def index_lookup(self, query: "Query") -> Optional[Set[int]]:
+        if not self.indexes:
+            return None
+        return plan_index_lookup(query, self.indexes)
+
+    @reading
+    def fetch_many(
+        self,
+        ids: Iterable[int],
+        jx9_filter: Optional[Jx9Filter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Fetch the records of `ids` in id order with a single Jx9 program.
+
+        With `jx9_filter` only the records matching it are returned.
+        """
+        ids = sorted(ids)
+        scanned(len(ids))
+        jx9_filter = jx9_filter or Jx9Filter("TRUE")
+        with timer("storage_time"), self.db.vm(jx9_filter.fetch_script) as vm:
+            vm.set_values(jx9_filter.params)
+            vm.set_values({"collection": self.name, "ids": ids})
+            vm.execute()
+            return vm["data"] or []
+
+    def _fetch_matching(
+        self,
+        query: "Query",
+        ids: Iterable[int],
+    ) -> List[Dict[str, Any]]:
+        """Records of the index candidates `ids` matching `query`.
+
+        The candidates are checked like a scan would, through the Jx9 filter
+        first, so a comparison Python cannot make is a miss, not an error.
+        """
+        plan = plan_query(query)
+        jx9_filter, residual = plan.jx9_filter, plan.residual
+        if jx9_filter is None:
+            residual = plan.predicate
+        records = self.fetch_many(ids, jx9_filter)
+        if residual is None:
+            return records
+        return [record for record in records if residual(record)]
+
+    def scan_jx9(
+        self,
+        jx9_filter: Jx9Filter,
+        batch_size: int = 1000,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        cursor, last = start, self.last_record_id()
+        if stop is not None:
+            last = min(last, stop - 1)
+        batch_size = max(batch_size, 1)
+        while cursor <= last:
+            data, next_cursor = self._scan_batch(jx9_filter, cursor, last, batch_size)
+            scanned(next_cursor - cursor)
+            cursor = next_cursor
+            yield from data
+
+    @reading
+    def _scan_batch(
+        self,
+        jx9_filter: Jx9Filter,
+        cursor: int,
+        last: int,
+        batch_size: int,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        with timer("storage_time"), self.db.vm(jx9_filter.scan_script) as vm:
+            vm.set_values(jx9_filter.params)
+            vm.set_values(
+                {
+                    "collection": self.name,
+                    "cursor": cursor,
+                    "last": last,
+                    "batch_size": batch_size,
+                },
+            )
+            vm.execute()
+            return vm["data"] or [], vm["cursor"]
+
+    def find_iter(
+        self,
+        query: Optional["Query"] = None,
+        batch_size: int = 1000,
+        only: Optional[Sequence[Sequence[str]]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        if query is not None and (ids := self.index_lookup(query)) is not None:
+            candidates = sorted(ids)
+            batch_size = max(batch_size, 1)
+            for start in range(0, len(candidates), batch_size):
+                batch = candidates[start : start + batch_size]
+                for record in self._fetch_matching(query, batch):
+                    yield project_dict(record, only) if only else record
+            return
+        yield from self.scan(query, batch_size, only)
+
+    def scan(
+        self,
+        query: Optional["Query"] = None,
+        batch_size: int = 1000,
+        only: Optional[Sequence[Sequence[str]]] = None,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Records with an id in `[start, stop)` matching `query`, without indexes."""
+        if query is None:
+            jx9_filter, residual = Jx9Filter("TRUE"), None
+        else:
+            plan = plan_query(query)
+            jx9_filter, residual = plan.jx9_filter, plan.residual
+            if jx9_filter is None:
+                jx9_filter, residual = Jx9Filter("TRUE"), plan.predicate
+        if only is not None and residual is None:
+            jx9_filter.row, only = compile_projection(only), None
+        records = self.scan_jx9(jx9_filter, batch_size, start, stop)
+        if residual is not None:
+            records = (record for record in records if residual(record))
+        if only is not None:
+            records = (project_dict(record, only) for record in records)
+        return records
+
+    def _parallel(self, query: Optional["Query"], processes: Optional[int]) -> bool:
+        return (
+            processes is not None
+            and processes > 1
+            and committable(self.db)
+            and (query is None or self.index_lookup(query) is None)
+        )
+
+    def find(
+        self,
+        query: Optional["Query"] = None,
+        only: Optional[Sequence[Sequence[str]]] = None,
+        processes: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Records matching `query` in id order.
+
+        With `processes` above 1 a scan is split by id range over a process
+        pool, see `parallel.scan_ranges`; index lookups stay in-process, and
+        so does the scan when pending writes cannot be committed for the pool.
+        """
+        if self._parallel(query, processes):
+            return parallel_find(self, query, only, processes)  # type: ignore
+        if query is None:
+            if only is None:
+                return self.all()
+            jx9_filter, residual = Jx9Filter("TRUE"), None
+        elif (ids := self.index_lookup(query)) is not None:
+            data = self._fetch_matching(query, ids)
+            return [project_dict(record, only) for record in data] if only else data
+        else:
+            plan = plan_query(query)
+            jx9_filter, residual = plan.jx9_filter, plan.residual
+        if jx9_filter is None:
+            data = self.filter(plan.predicate) or []
+        else:
+            if only is not None and residual is None:
+                jx9_filter.row, only = compile_projection(only), None
+            data = self.filter_jx9(jx9_filter)
+            if residual is not None:
+                data = [record for record in data if residual(record)]
+        if only is not None:
+            data = [project_dict(record, only) for record in data]
+        return data
+
+    def stats(
+        self,
+        query: Optional["Query"] = None,
+        path: Optional[Sequence[str]] = None,
+        processes: Optional[int] = None,
+    ) -> Stats:
+        if query is None and path is None:
+            return Stats(count=len(self))
+        if self._parallel(query, processes):
+            return parallel_stats(self, query, path, processes)  # type: ignore
+        if query is not None and (ids := self.index_lookup(query)) is not None:
+            keys = list(path) if path else []
+            records = self._fetch_matching(query, ids)
+            return Stats.from_values(recursively_get_item(r, keys) for r in records)
+        return self.scan_stats(query, path)
+
+    def scan_stats(
+        self,
+        query: Optional["Query"] = None,
+        path: Optional[Sequence[str]] = None,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Stats:
+        """Aggregate the records with an id in `[start, stop)`, without indexes."""
+        keys = list(path) if path else []
+        if query is None:
+            jx9_filter, residual = Jx9Filter("TRUE"), None
+        else:
+            plan = plan_query(query)
+            jx9_filter, residual = plan.jx9_filter, plan.residual
+        if jx9_filter is None or residual is not None:
+            rows = self.scan(query, only=[keys] if keys else [], start=start, stop=stop)
+            return Stats.from_values(recursively_get_item(r, keys) for r in rows)
+        last = self.last_record_id()
+        if stop is not None:
+            last = min(last, stop - 1)
+        scanned(last + 1 - start)
+        script = jx9_filter.aggregate_script(keys)
+        with self.lock.read(), timer("storage_time"), self.db.vm(script) as vm:
+            vm.set_values(jx9_filter.params)
+            vm.set_values({"collection": self.name, "first": start, "last": last})
+            vm.execute()
+            return Stats(
+                vm["count"],
+                vm["numeric"],
+                vm["total"],
+                vm["minimum"],
+                vm["maximum"],
+            )
+
+    def group_stats(
+        self,
+        query: Optional["Query"],
+        key: Sequence[str],
+        path: Optional[Sequence[str]] = None,
+        processes: Optional[int] = None,
+    ) -> Dict[Any, Stats]:
+        if self._parallel(query, processes):
+            return parallel_group_stats(self, query, key, path, processes)  # type: ignore
+        only = normalize_paths([key, path] if path else [key])
+        return group_stats(
+            self.find_iter(query, only=only),
+            lambda row: recursively_get_item(row, list(key)),
+            lambda row: recursively_get_item(row, list(path)) if path else None,
+        )
 
+    def find_sorted(
+        self,
+        query: Optional["Query"],
+        orders: Sequence[Tuple[List[str], bool]],
+        limit: Optional[int] = None,
+        skip: int = 0,
+        only: Optional[Sequence[Sequence[str]]] = None,
+        processes: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        index = self._order_index(query, orders, limit)
+        if index is not None:
+            predicate = plan_query(query).predicate if query is not None else None
+            records = (self.fetch(id) for id in index.iter_ids(orders[0][1]))
+            data = list(
+                islice(
+                    (r for r in records if r and (predicate is None or predicate(r))),
+                    skip,
+                    skip + limit,
+                ),
+            )
+        else:
+            fetch_only = None
+            if only is not None:
+                fetch_only = normalize_paths([*only, *(keys for keys, _ in orders)])
+            key = record_sort_key(orders)
+            if limit is None:
+                data = sorted(self.find(query, fetch_only, processes), key=key)[skip:]
+            elif self._parallel(query, processes):
+                records = self.find(query, fetch_only, processes)
+                data = heapq.nsmallest(skip + limit, records, key=key)[skip:]
+            else:
+                records = self.find_iter(query, skip + limit, only=fetch_only)
+                data = heapq.nsmallest(skip + limit, records, key=key)[skip:]
+        if only is not None:
+            data = [project_dict(record, only) for record in data]
+        return data
+
+    def _order_index(
+        self,
+        query: Optional["Query"],
+        orders: Sequence[Tuple[List[str], bool]],
+        limit: Optional[int],
+    ) -> Optional[Index]:
+        """Index to walk for the first `limit` records in order, if worth it.
+
+        Walking the index fetches the records one by one, which only pays
+        when the filter can use neither an index nor Jx9 anyway.
+        """
+        if limit is None or len(orders) != 1:
+            return None
+        index = self.indexes.get(".".join(orders[0][0]))
+        if index is None or query is None:
+            return index
+        if self.index_lookup(query) is not None or plan_query(query).jx9_filter:
+            return None
+        return index
+
+    @reading
+    def explain(
+        self,
+        query: Optional["Query"] = None,
+        limit: Optional[int] = None,
+        orders: Optional[Sequence[Tuple[List[str], bool]]] = None,
+        processes: Optional[int] = None,
+    ) -> Explanation:
+        """How `find`, `find_iter` or `find_sorted` would look up `query`.
+
+        `limit` and `orders` select the method like `Document.find_all` does.
+        """
+        explanation = Explanation(
+            self.name,
+            None if query is None else str(query),
+            "all",
+            "all",
+            len(self),
+        )
+        if orders is not None and self._order_index(query, orders, limit) is not None:
+            explanation.access = "fetch in index order"
+            if query is not None:
+                explanation.strategy = "python"
+            return explanation
+        if self._parallel(query, processes):
+            explanation.access, explanation.processes = "parallel scan", processes
+        elif query is not None and (ids := self.index_lookup(query)) is not None:
+            explanation.strategy, explanation.estimated = "index", len(ids)
+            explanation.access = "fetch_many" if limit is None else "fetch"
+            return explanation
+        elif limit is not None:
+            explanation.access = "scan_jx9"
+        if query is None:
+            return explanation
+        plan = plan_query(query)
+        jx9_filter = plan.jx9_filter
+        if jx9_filter is None:
+            explanation.strategy = "python"
+            if explanation.access == "all":
+                explanation.access = "filter"
+        else:
+            explanation.jx9 = jx9_filter.expression
+            explanation.strategy = "jx9" if plan.residual is None else "jx9+python"
+            if explanation.access == "all":
+                explanation.access = "filter_jx9"
+        return explanation
+
+    @writing
     def create(self) -> bool:
-        return self.collection.create()
+        return self.db._apply(self.collection.create)
 
+    @writing
     def drop(self) -> bool:
-        return self.collection.drop()
+        if self.db.identity_map is not None:
+            self.db.identity_map.clear(self.name)
+        for index in self.indexes.values():
+            index.clear()
+        return self.db._apply(self.collection.drop)
 
+    @reading
     def exists(self) -> bool:
         return self.collection.exists()
 
+    @reading
     def creation_date(self) -> Optional[datetime]:
         date = self.collection.creation_date()
         if isinstance(date, str):
             return datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
         return None
 
+    @writing
     def set_schema(self, schema: Dict[str, Any], **kwargs) -> bool:
-        return self.collection.set_schema(schema, **kwargs)
+        return self.db._apply(partial(self.collection.set_schema, schema, **kwargs))
 
+    @reading
     def get_schema(self) -> Dict[str, Any]:
         return self.collection.get_schema()
 
+    @reading
     def last_record_id(self) -> int:
         return self.collection.last_record_id()
 
     def current_record_id(self) -> int:
+        """Id at the cursor shared by the collection, not thread-safe."""
         return self.collection.current_record_id()
 
     def reset_cursor(self) -> None:
+        """Rewind the cursor shared by the collection, not thread-safe."""
         self.collection.reset_cursor()
 
+    @reading
     def fetch(self, id: int) -> Optional[Dict[str, Any]]:
-        return self.collection.fetch(id)
+        scanned(1)
+        with timer("storage_time"):
+            return self.collection.fetch(id)
 
     def __getitem__(self, id: int) -> Optional[Dict[str, Any]]:
-        return self.collection.fetch(id)
+        return self.fetch(id)
 
     @overload
     def store(
@@ -107,31 +566,248 @@ class Collection:
     ) -> bool:
         ...
 
+    @writing
     def store(
         self,
         data: Union[Dict[str, Any], List[Dict[str, Any]]],
         return_id: bool = True,
     ) -> Union[int, bool]:
-        return self.collection.store(data, return_id)
-
-    def update(self, id: int, data: Dict[str, Any]) -> bool:
-        return self.collection.update(id, data)
+        if not self.indexes:
+            return self.db._apply(self.collection.store, data, return_id)
+        records = data if isinstance(data, list) else [data]
+        last_id = self.db._apply(self.collection.store, data, True)
+        added = list(enumerate(records, last_id - len(records) + 1))
+        for index in self.indexes.values():
+            index.update([], added)
+        return last_id if return_id else True
+
+    @writing
+    def store_many(
+        self,
+        records: Iterable[Dict[str, Any]],
+        chunk_size: int = 1000,
+    ) -> BulkResult:
+        """Store `records` in a single transaction, `chunk_size` per `store` call.
+
+        UnQLite assigns consecutive ids to a stored list, so the id of every
+        record is derived from the last id returned for its chunk.
+        """
+        result = BulkResult()
+        chunk_size = max(chunk_size, 1)
+        iterator = iter(records)
+        start = time.perf_counter()
+        with self.db.transaction():
+            while chunk := list(islice(iterator, chunk_size)):
+                last_id = self.store(chunk, True)
+                result.ids.extend(range(last_id - len(chunk) + 1, last_id + 1))
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    @writing
+    def update(
+        self,
+        id: int,
+        data: Dict[str, Any],
+        old: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Replace record `id`, `old` is its current content if already fetched."""
+        self._forget(id)
+        if not self.indexes:
+            return self.db._apply(self.collection.update, id, data)
+        if old is None:
+            old = self.collection.fetch(id)
+        result = self.db._apply(self.collection.update, id, data)
+        if result:
+            for index in self.indexes.values():
+                if old is None:
+                    index.add(id, data)
+                elif index.value_of(old) != index.value_of(data):
+                    index.update([(id, old)], [(id, data)])
+        return result
 
     def __setitem__(self, id: int, data: Dict[str, Any]) -> bool:
-        return self.collection.update(id, data)
+        return self.update(id, data)
 
+    @writing
+    def update_records(
+        self,
+        records: Dict[int, Dict[str, Any]],
+        old: Optional[Dict[int, Dict[str, Any]]] = None,
+    ) -> int:
+        """Replace several records with a single Jx9 program.
+
+        `old` maps ids to their current content if already fetched, it is only
+        needed to keep the indexes in sync.
+        """
+        if not records:
+            return 0
+        self._forget(*records)
+        if self.indexes and old is None:
+            old = {record["__id"]: record for record in self.fetch_many(records)}
+        ids, values = list(records), list(records.values())
+        count = self.db._apply(self._update_script, ids, values)
+        for index in self.indexes.values():
+            removed, added = [], []
+            for id, data in records.items():
+                previous = old.get(id) if old else None
+                if previous is None:
+                    continue
+                if index.value_of(previous) != index.value_of(data):
+                    removed.append((id, previous))
+                    added.append((id, data))
+            index.update(removed, added)
+        return count
+
+    @writing
     def delete(self, id: int) -> bool:
-        return self.collection.delete(id)
+        self._forget(id)
+        if not self.indexes:
+            return self.db._apply(self.collection.delete, id)
+        old = self.collection.fetch(id)
+        result = self.db._apply(self.collection.delete, id)
+        if result and old is not None:
+            for index in self.indexes.values():
+                index.remove(id, old)
+        return result
 
     def __delitem__(self, id: int) -> bool:
-        return self.collection.delete(id)
+        return self.delete(id)
+
+    def _update_script(self, ids: List[int], records: List[Dict[str, Any]]) -> int:
+        with self.db.vm(UPDATE_SCRIPT) as vm:
+            vm.set_values({"collection": self.name, "ids": ids, "records": records})
+            vm.execute()
+            return vm["count"]
+
+    def _forget(self, *ids: int) -> None:
+        if self.db.identity_map is not None:
+            for id in ids:
+                self.db.identity_map.discard(self.name, id)
+
+    @writing
+    def upsert(
+        self,
+        query: "Query",
+        data: Dict[str, Any],
+    ) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Replace the first record matching `query` with `data`, or store it.
+
+        Returns the id and the previous record, `None` when `data` was inserted.
+        """
+        with self.db.transaction():
+            old = next(self.find_iter(query, 1), None)
+            if old is None:
+                return self.store(data, True), None
+            id = old["__id"]
+            if not same_record(old, data):
+                self.update(id, data, old)
+            return id, old
+
+    @writing
+    def upsert_many(
+        self,
+        key: Sequence[str],
+        records: Iterable[Dict[str, Any]],
+        chunk_size: int = 1000,
+    ) -> UpsertResult:
+        """Upsert `records` matched by the value at `key` in a single transaction.
+
+        Existing ids are looked up in the index of `key` when there is one,
+        otherwise the collection is scanned once for the values of `key`.
+        Matched records are compared and rewritten `chunk_size` at a time,
+        the others are inserted through `store_many`; the last record wins
+        when the same new key appears more than once.
+        """
+        result = UpsertResult()
+        index = self.indexes.get(".".join(key))
+        known: Optional[Dict[Any, int]] = None
+        new: Dict[Any, Dict[str, Any]] = {}
+        slots: List[Tuple[bool, Any]] = []
+        start = time.perf_counter()
+        with self.db.transaction():
+            iterator = iter(records)
+            while chunk := list(islice(iterator, chunk_size)):
+                matched: Dict[int, Dict[str, Any]] = {}
+                for record in chunk:
+                    value = recursively_get_item(record, list(key))
+                    if index is not None and normalize_value(value) is not _MISSING:
+                        id = min(index.ids(normalize_value(value)), default=None)
+                    else:
+                        if known is None:
+                            known = self._key_ids(key, chunk_size)
+                        id = known.get(hashable(value))
+                    if id is None:
+                        new[hashable(value)] = record
+                        slots.append((True, hashable(value)))
+                    else:
+                        matched[id] = record
+                        slots.append((False, id))
+                old = {record["__id"]: record for record in self.fetch_many(matched)}
+                changed = {
+                    id: record
+                    for id, record in matched.items()
+                    if id in old and not same_record(old[id], record)
+                }
+                result.updated += self.update_records(changed, old)
+            stored = self.store_many(new.values(), chunk_size)
+        new_ids = dict(zip(new, stored.ids))
+        result.ids = [new_ids[v] if inserted else v for inserted, v in slots]
+        result.inserted = stored.count
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def _key_ids(self, key: Sequence[str], batch_size: int) -> Dict[Any, int]:
+        ids: Dict[Any, int] = {}
+        for row in self.find_iter(None, batch_size, only=[key]):
+            ids.setdefault(hashable(recursively_get_item(row, list(key))), row["__id"])
+        return ids
+
+    @writing
+    def update_many(
+        self,
+        query: Optional["Query"],
+        changes: Sequence[Tuple[Sequence[str], Any]],
+    ) -> int:
+        """Set `changes` on the records matching `query` in a single transaction."""
+        with self.db.transaction():
+            records = {record.pop("__id"): record for record in self.find(query) or []}
+            for record in records.values():
+                for keys, value in changes:
+                    recursively_set_item(record, keys, value)
+            return self.update_records(records)
+
+    @writing
+    def delete_many(self, query: Optional["Query"]) -> int:
+        """Delete the records matching `query` in a single transaction."""
+        only = [index.keys for index in self.indexes.values()]
+        deleted = []
+        with self.db.transaction():
+            for record in self.find(query, only=only) or []:
+                id = record["__id"]
+                self._forget(id)
+                if self.db._apply(self.collection.delete, id):
+                    deleted.append((id, record))
+            for index in self.indexes.values():
+                index.update(deleted, [])
+        return len(deleted)
 
     def fetch_current(self) -> Optional[Dict[str, Any]]:
+        """Record at the cursor shared by the collection, not thread-safe."""
         return self.collection.fetch_current()
 
 
 class Database:
-    _documents: Set[str] = set()
+    """An UnQLite database and the collections of its documents.
+
+    With `thread_safe=True` the database may be shared between threads: every
+    operation holds a readers-writer lock, so reads run alongside each other
+    while writes and `transaction()` blocks are exclusive. Scans keep their
+    own position instead of the cursor of the UnQLite collection; the cursor
+    API (`fetch_current`, `reset_cursor`, `cursor()`) is still not safe.
+
+    `codec` is the default of the key-value namespaces, see `namespace()`.
+    Document records are always stored as JSON, so Jx9 can query them.
+    """
 
     def __init__(
         self,
@@ -139,6 +815,10 @@ class Database:
         documents: Optional[Iterable[Type["Document"]]] = None,
         flags: UnqliteOpenFlag = UnqliteOpenFlag.CREATE,
         open_database: bool = True,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None,
+        thread_safe: bool = False,
+        codec: Optional[Codec] = None,
     ) -> None:
         if isinstance(filename, str) and filename != ":mem:":
             filename = Path(filename)
@@ -149,6 +829,20 @@ class Database:
         )
         self.db: unqlite.UnQLite = unqlite.UnQLite(self.filename, flags, open_database)
         self.collections: Dict[str, Collection] = {}
+        self.lock: Union[RWLock, NullLock] = RWLock() if thread_safe else NullLock()
+        self._documents: Set[str] = set()
+        self.autocommit = True
+        self._depth = 0
+        self._dirty = False
+        self._journal: List[Tuple[Callable[..., Any], Tuple[Any, ...]]] = []
+        self._journaling = False
+        self._batch: Optional[WriteBatch] = None
+        self.hooks: List[Hook] = []
+        self.codec: Codec = JSONCodec() if codec is None else codec
+        self.identity_map: Optional[IdentityMap] = (
+            IdentityMap(cache_size, cache_ttl) if cache_size > 0 else None
+        )
+        self._aio: Optional[AsyncDatabase] = None
         if documents:
             for document in documents:
                 if document.meta.name not in self._documents:
@@ -162,10 +856,30 @@ class Database:
     def opened(self) -> bool:
         return self.db.is_open
 
+    @property
+    def aio(self) -> AsyncDatabase:
+        """Asyncio facade running the operations on a worker thread."""
+        if self._aio is None:
+            self._aio = AsyncDatabase(self)
+        return self._aio
+
+    def add_hook(self, hook: Hook) -> Hook:
+        """Call `hook` with an `OperationEvent` after every `Document` operation."""
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook: Hook) -> None:
+        self.hooks.remove(hook)
+
+    def emit(self, event: OperationEvent) -> None:
+        emit(self.hooks, event)
+
     def init_model(self, model: Type["Document"]):
         model.collection = self.collection(model.meta.name)
         model.meta.db = self
         model.collection.set_schema(model.schema(by_alias=model.meta.by_alias))
+        for path in model.meta.indexes:
+            model.collection.create_index(path)
 
     def open(self) -> bool:
         if self.opened:
@@ -186,49 +900,203 @@ class Database:
         self.close()
 
     def disable_autocommit(self):
+        """Do not commit pending writes when the database is closed."""
+        self.autocommit = False
         return self.db.disable_autocommit()
 
+    def _apply(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a raw write, journal it for savepoints or count it in a batch."""
+        with timer("storage_time"):
+            result = func(*args)
+        self._dirty = True
+        if self._depth:
+            if self._journaling:
+                self._journal.append((func, args))
+        elif self._batch is not None and self._batch.due():
+            self.commit()
+        return result
+
+    @writing
     def store(self, key: str, value: Any) -> None:
-        return self.db.store(key, value)
+        return self._apply(self.db.store, key, value)
 
     def __setitem__(self, key: str, value: Any) -> None:
-        return self.db.store(key, value)
+        return self.store(key, value)
 
+    @reading
     def fetch(self, key: str) -> Optional[bytes]:
         try:
-            return self.db.fetch(key)
+            with timer("storage_time"):
+                return self.db.fetch(key)
         except KeyError:
             return None
 
+    @reading
     def __getitem__(self, key: str) -> Optional[bytes]:
         return self.db.fetch(key)
 
+    @writing
     def delete(self, key: str) -> None:
-        return self.db.delete(key)
+        return self._apply(self.db.delete, key)
 
     def __delitem__(self, key: str) -> None:
-        return self.db.delete(key)
+        return self.delete(key)
 
+    @writing
     def append(self, key: str, value: Any) -> None:
-        return self.db.append(key, value)
+        return self._apply(self.db.append, key, value)
 
+    @reading
     def exists(self, key: str) -> bool:
-        return self.db.exists(key)
+        with timer("storage_time"):
+            return self.db.exists(key)
 
     def __contains__(self, key: str) -> bool:
-        return self.db.exists(key)
+        return self.exists(key)
+
+    @reading
+    def mget(self, keys: Iterable[str]) -> List[Optional[bytes]]:
+        """Values of `keys` in order, `None` for the missing ones."""
+        fetch, values = self.db.fetch, []
+        with timer("storage_time"):
+            for key in keys:
+                try:
+                    values.append(fetch(key))
+                except KeyError:
+                    values.append(None)
+        return values
+
+    def mset(self, data: Mapping[str, Any]) -> None:
+        """Store every item of `data` in a single transaction."""
+        with self.transaction():
+            self._apply(self.db.update, dict(data))
+
+    def mdelete(self, keys: Iterable[str]) -> int:
+        """Delete `keys` in a single transaction, return how many existed."""
+        with self.transaction():
+            existing = [key for key in dict.fromkeys(keys) if self.db.exists(key)]
+            if existing:
+                self._apply(self._delete_keys, existing)
+        return len(existing)
+
+    def _delete_keys(self, keys: List[str]) -> None:
+        for key in keys:
+            self.db.delete(key)
+
+    def namespace(
+        self,
+        model: Type[ModelT],
+        prefix: Optional[str] = None,
+        codec: Optional[Codec] = None,
+    ) -> KeyValueStore[ModelT]:
+        """Key-value store of `model` values under `prefix`, see `KeyValueStore`."""
+        return KeyValueStore(self, model, prefix, codec)
+
+    @property
+    def supports_rollback(self) -> bool:
+        """Whether `rollback()` undoes writes, it is a no-op for `:mem:`."""
+        return self.filename != ":mem:"
 
     def begin(self) -> bool:
         return self.db.begin()
 
     def rollback(self) -> bool:
+        if self.identity_map is not None:
+            self.identity_map.clear()
+        for collection in self.collections.values():
+            for index in collection.indexes.values():
+                index.invalidate()
+        self._dirty = False
+        if self._batch is not None:
+            self._batch.committed()
         return self.db.rollback()
 
     def commit(self) -> bool:
+        self._dirty = False
+        if self._batch is not None:
+            self._batch.committed()
         return self.db.commit()
 
-    def transaction(self) -> unqlite.Transaction:
-        return self.db.transaction()
+    def atomic(self) -> Atomic:
+        """Run the block in a transaction, or a savepoint when nested.
+
+        Everything written inside, including by `Document` methods, is
+        committed once when the outermost block ends. A failing nested block
+        only undoes its own writes, see `Atomic`.
+
+        UnQLite cannot roll back an in-memory database: on `:mem:` a failing
+        block keeps the writes it made and they are committed, see
+        `supports_rollback`.
+        """
+        return Atomic(self)
+
+    def transaction(self) -> Atomic:
+        """Like `atomic()`, but a nested block joins the enclosing transaction.
+
+        The writes of an outermost `transaction()` are not journaled, so an
+        `atomic()` block nested after the first of them joins it as well.
+        """
+        return Atomic(self, savepoint=False)
+
+    def _begin_atomic(self, savepoint: bool) -> Optional[int]:
+        if self._depth:
+            self._depth += 1
+            if savepoint and not self._dirty and self.supports_rollback:
+                # nothing written before the block, the journal is complete
+                self._journaling = True
+            return len(self._journal) if savepoint and self._journaling else None
+        if self._dirty:
+            # keep the writes made before the block out of its transaction
+            self.commit()
+        self.db.begin()
+        self._depth = 1
+        self._journaling = savepoint and self.supports_rollback
+        return None
+
+    def _end_atomic(self, mark: Optional[int], success: bool) -> None:
+        self._depth -= 1
+        if not self._depth:
+            self._journal, self._journaling = [], False
+            if success or not self.supports_rollback:
+                self.commit()
+            else:
+                self.rollback()
+        elif not success and mark is not None and self.supports_rollback:
+            journal = self._journal[:mark]
+            self.rollback()
+            self.db.begin()
+            for func, args in journal:
+                func(*args)
+            self._journal, self._dirty = journal, True
+
+    @contextmanager
+    def batch(
+        self,
+        size: int = 1000,
+        interval: Optional[float] = None,
+    ) -> Iterator[WriteBatch]:
+        """Commit the writes of the block every `size` writes or `interval` seconds.
+
+        UnQLite otherwise commits only when the database is closed, or never
+        after `disable_autocommit()`. Transactions inside the block commit on
+        their own. What is left is committed at the end; if the block fails
+        with autocommit disabled, it is rolled back instead.
+        """
+        previous, self._batch = self._batch, WriteBatch(size, interval)
+        batch, failed = self._batch, False
+        try:
+            yield batch
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self.lock.write():
+                if not self._depth and self._dirty:
+                    if failed and not self.autocommit and self.supports_rollback:
+                        self.rollback()
+                    else:
+                        self.commit()
+                self._batch = previous
 
     def commit_on_success(self, func) -> None:
         return self.db.commit_on_success(func)
@@ -253,8 +1121,9 @@ class Database:
     def items(self) -> Generator[Tuple[str, bytes], None, None]:
         return self.db.items()
 
+    @writing
     def update(self, data: Dict[str, Any]) -> None:
-        self.db.update(data)
+        self._apply(self.db.update, data)
 
     def __iter__(self) -> Iterator[Tuple[str, bytes]]:
         return iter(self.db.items())
@@ -267,6 +1136,7 @@ class Database:
     ) -> Generator[Tuple[str, bytes], None, None]:
         return self.db.range(start, stop, include_end_key)
 
+    @reading
     def __len__(self) -> int:
         return self.db.__len__()
 
@@ -0,0 +1,148 @@
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Type, TypeVar
+
+from pydantic.fields import ModelField, SHAPE_DICT, SHAPE_LIST, SHAPE_SINGLETON
+from pydantic.main import BaseModel
+from pydantic.utils import lenient_issubclass
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_RAW_TYPES = (str, int, bool)
+
+RAW, FLOAT, RAW_LIST, RAW_DICT, MODEL, MODEL_LIST, VALIDATE = range(7)
+
+
+class FieldPlan(NamedTuple):
+    name: str
+    key: str
+    kind: int
+    type_: Any
+    required: bool
+    allow_none: bool
+    field: ModelField
+
+
+def _is_raw(value: Any, type_: Any) -> bool:
+    """Whether pydantic would keep `value` as is for a field of `type_`."""
+    if type_ is int:
+        # bool is an int subclass, pydantic converts it
+        return value.__class__ is int
+    return isinstance(value, type_)
+
+
+class UntrustedRecord(Exception):
+    """The record does not match the current model and has to be validated."""
+
+
+def _field_kind(field: ModelField) -> int:
+    type_ = field.type_
+    if field.sub_fields and field.shape == SHAPE_SINGLETON:
+        return VALIDATE
+    if field.shape == SHAPE_SINGLETON:
+        if type_ is Any or type_ in _RAW_TYPES:
+            return RAW
+        if type_ is float:
+            return FLOAT
+        if lenient_issubclass(type_, BaseModel):
+            return MODEL
+    elif field.shape == SHAPE_LIST:
+        if type_ is Any or type_ in _RAW_TYPES:
+            return RAW_LIST
+        if lenient_issubclass(type_, BaseModel) and not type_.__custom_root_type__:
+            return MODEL_LIST
+    elif field.shape == SHAPE_DICT and field.key_field and field.key_field.type_ is str:
+        if type_ is Any or type_ in _RAW_TYPES:
+            return RAW_DICT
+    return VALIDATE
+
+
+@lru_cache(maxsize=None)
+def _model_plan(model: Type[BaseModel], by_alias: bool) -> Tuple[FieldPlan, ...]:
+    return tuple(
+        FieldPlan(
+            name,
+            field.alias if by_alias else name,
+            _field_kind(field),
+            object if field.type_ is Any else field.type_,
+            field.required,
+            field.allow_none,
+            field,
+        )
+        for name, field in model.__fields__.items()
+    )
+
+
+def _construct(model: Type[ModelT], data: Any, by_alias: bool) -> ModelT:
+    if data.__class__ is not dict or model.__custom_root_type__:
+        raise UntrustedRecord
+    values: Dict[str, Any] = {}
+    fields_set = set()
+    for name, key, kind, type_, required, allow_none, field in _model_plan(
+        model,
+        by_alias,
+    ):
+        if key not in data:
+            if required:
+                raise UntrustedRecord
+            values[name] = field.get_default()
+            continue
+        value = data[key]
+        fields_set.add(name)
+        if value is None:
+            if not allow_none:
+                raise UntrustedRecord
+        elif kind == RAW:
+            if not _is_raw(value, type_):
+                raise UntrustedRecord
+        elif kind == FLOAT:
+            if value.__class__ is not float:
+                if value.__class__ is not int:
+                    raise UntrustedRecord
+                value = float(value)
+        elif kind == RAW_LIST:
+            if value.__class__ is not list or not all(
+                _is_raw(item, type_) for item in value
+            ):
+                raise UntrustedRecord
+        elif kind == RAW_DICT:
+            if value.__class__ is not dict or not all(
+                _is_raw(item, type_) for item in value.values()
+            ):
+                raise UntrustedRecord
+        elif kind == MODEL:
+            value = _construct(type_, value, by_alias)
+        elif kind == MODEL_LIST:
+            if value.__class__ is not list:
+                raise UntrustedRecord
+            value = [_construct(type_, item, by_alias) for item in value]
+        else:
+            value, errors = field.validate(value, values, loc=key, cls=model)
+            if errors:
+                raise UntrustedRecord
+        values[name] = value
+    if len(fields_set) != len(data):
+        raise UntrustedRecord
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__fields_set__", fields_set)
+    instance._init_private_attributes()
+    return instance
+
+
+def construct_document(
+    model: Type[ModelT],
+    data: Dict[str, Any],
+    by_alias: bool = False,
+) -> Optional[ModelT]:
+    """Build `model` from a stored record, skipping validation where possible.
+
+    Fields holding JSON native values are trusted as stored, nested models are
+    constructed recursively and every other field runs its own validator only.
+    Returns `None` when the record does not match the model, e.g. when it was
+    written by an older version of the schema, so the caller can fall back to
+    full validation.
+    """
+    try:
+        return _construct(model, data, by_alias)
+    except UntrustedRecord:
+        return None
@@ -0,0 +1,101 @@
+from functools import lru_cache
+import json
+from typing import Any, Callable, Dict, Optional, Type
+
+from pydantic.json import ENCODERS_BY_TYPE, pydantic_encoder
+from pydantic.main import BaseModel
+
+_PRIMITIVES = frozenset({str, int, float, bool, type(None)})
+
+
+@lru_cache(maxsize=None)
+def _type_encoder(cls: type) -> Optional[Callable[[Any], Any]]:
+    for base in cls.__mro__[:-1]:
+        if base in ENCODERS_BY_TYPE:
+            return ENCODERS_BY_TYPE[base]
+    return None
+
+
+@lru_cache(maxsize=None)
+def _model_keys(model: Type[BaseModel], by_alias: bool) -> Optional[Dict[str, str]]:
+    """Storage key of every field, `None` if the model needs `BaseModel.dict`."""
+    if (
+        model.__custom_root_type__
+        or model.__exclude_fields__
+        or model.__include_fields__
+        or model.dict is not BaseModel.dict
+        or model._iter is not BaseModel._iter
+    ):
+        return None
+    return {
+        name: field.alias if by_alias else name
+        for name, field in model.__fields__.items()
+    }
+
+
+def _encode_key(key: Any) -> str:
+    if isinstance(key, str):
+        return str.__str__(key)
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, int):
+        return int.__repr__(key)
+    if isinstance(key, float):
+        return float.__repr__(key)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key)}")
+
+
+class ModelEncoder:
+    """Convert a model to JSON compatible primitives in a single pass.
+
+    Mirrors `json.loads(model.json(by_alias=...))` without building the
+    intermediate string.
+    """
+
+    def __init__(
+        self,
+        by_alias: bool = False,
+        default: Callable[[Any], Any] = pydantic_encoder,
+    ) -> None:
+        self.by_alias = by_alias
+        self.default = default
+
+    def encode_model(self, model: BaseModel) -> Any:
+        keys = _model_keys(type(model), self.by_alias)
+        if keys is None:
+            data = model.dict(by_alias=self.by_alias)
+            return self.encode(data.get("__root__", data))
+        encode = self.encode
+        return {
+            keys.get(name, name): encode(value)
+            for name, value in model.__dict__.items()
+        }
+
+    def encode(self, value: Any) -> Any:
+        cls = value.__class__
+        if cls in _PRIMITIVES:
+            return value
+        if isinstance(value, str):
+            return str.__str__(value)
+        if isinstance(value, int):
+            return bool(value) if isinstance(value, bool) else int(value)
+        if isinstance(value, float):
+            return float(value)
+        if isinstance(value, (list, tuple)):
+            return [self.encode(v) for v in value]
+        if isinstance(value, dict):
+            return {_encode_key(k): self.encode(v) for k, v in value.items()}
+        if isinstance(value, BaseModel):
+            return self.encode_model(value)
+        encoder = _type_encoder(cls) if self.default is pydantic_encoder else None
+        return self.encode(encoder(value) if encoder else self.default(value))
+
+
+def encode_document(model: BaseModel, by_alias: bool = False) -> Dict[str, Any]:
+    if _model_keys(type(model), by_alias) is None:
+        return json.loads(model.json(by_alias=by_alias))
+    return ModelEncoder(by_alias, model.__json_encoder__).encode_model(model)
@@ -1,6 +1,16 @@
 from dataclasses import dataclass
 import operator
-from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 from typing_extensions import Self
 
 T = TypeVar("T")
@@ -96,6 +106,12 @@ class Query:
     operator: OperatorFunc
     right: Any
 
+    def __post_init__(self) -> None:
+        if isinstance(self.left, QueryPathProxy):
+            self.left = self.left.path
+        if isinstance(self.right, QueryPathProxy):
+            self.right = self.right.path
+
     def startswith(self, other: Any):
         return Query(self, _startswith, other)
 
@@ -180,6 +196,8 @@ class Query:
     ) -> Self:
         if operator_func is None:
             operator_func = operator.and_
+        if not expressions:
+            raise TypeError("至少需要一个查询条件")
         if not isinstance(expressions[0], cls):
             raise TypeError("表达式必须是 Query 对象")
         if len(expressions) == 1:
@@ -207,6 +225,39 @@ class Query:
         return data
 
 
+PathLike = Union[QueryPathProxy, QueryPath, str]
+
+
+def path_keys(path: PathLike) -> List[str]:
+    if isinstance(path, QueryPathProxy):
+        return list(path.path)
+    if isinstance(path, str):
+        return path.split(".")
+    return list(path)
+
+
+OrderLike = Union[PathLike, "Query"]
+
+
+def order_keys(
+    order_by: Union[OrderLike, Sequence[OrderLike]],
+) -> List[Tuple[List[str], bool]]:
+    """`(path keys, descending)` pairs of `order_by`, `-Model.field` is descending."""
+    if isinstance(order_by, (QueryPathProxy, QueryPath, str, Query)):
+        order_by = [order_by]
+    orders: List[Tuple[List[str], bool]] = []
+    for item in order_by:
+        if isinstance(item, Query):
+            if item.operator is not _neg or not isinstance(item.left, QueryPath):
+                raise TypeError(f"不支持的排序表达式 {item}")
+            orders.append((list(item.left), True))
+        elif isinstance(item, str) and item.startswith("-"):
+            orders.append((path_keys(item[1:]), True))
+        else:
+            orders.append((path_keys(item), False))
+    return orders
+
+
 def _neg(a: Any, b: Any) -> bool:
     return -a
 
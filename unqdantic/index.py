@@ -0,0 +1,332 @@
+from bisect import bisect_left, bisect_right
+import json
+import operator
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TYPE_CHECKING,
+)
+
+from .expression import _contains, _startswith, Query, QueryPath
+from .utils import recursively_get_item, sort_key, SortKey
+
+if TYPE_CHECKING:
+    from .core import Collection
+
+INDEX_PREFIX = "__unqdantic_index__:"
+INDEX_FORMAT = "2"
+"""Version of the key layout, kept in the marker with the directory page count."""
+
+_MISSING = object()
+
+
+def normalize_value(value: Any) -> Any:
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return _MISSING
+
+
+class Index:
+    """Secondary index of a collection field stored in the KV side of UnQLite.
+
+    The ids of the records with a value are split into pages of `PAGE_SIZE`
+    consecutive ids, stored under `<prefix><json value>#<page>`, and the
+    numbers of the pages in use under `<prefix><json value>`; a change
+    rewrites one page instead of every id of the value. UnQLite KV engines
+    are hash based, so the values are also logged under the marker, in pages
+    of `DIRECTORY_PAGE_SIZE` lines, and the sorted directory used by range and
+    prefix lookups is built lazily in memory from that log.
+    """
+
+    PAGE_SIZE = 512
+    DIRECTORY_PAGE_SIZE = 256
+
+    def __init__(self, collection: "Collection", path: str) -> None:
+        self.collection = collection
+        self.path = path
+        self.keys = path.split(".")
+        self.marker = f"{INDEX_PREFIX}{collection.name}:{path}"
+        self.prefix = f"{self.marker}:"
+        self._sort_keys: Optional[List[SortKey]] = None
+
+    def __repr__(self) -> str:
+        return f"Index(collection={self.collection.name}, path={self.path})"
+
+    @property
+    def db(self):
+        return self.collection.db
+
+    def key(self, value: Any) -> str:
+        return self.prefix + json.dumps(value)
+
+    def value_of(self, record: Dict[str, Any]) -> Any:
+        return normalize_value(recursively_get_item(record, self.keys))
+
+    def ids(self, value: Any) -> List[int]:
+        key = self.key(value)
+        return [
+            id
+            for page in sorted(self._numbers(key))
+            for id in sorted(self._numbers(f"{key}#{page}"))
+        ]
+
+    def build(self) -> None:
+        self.db.store(self.marker, f"{INDEX_FORMAT}:0")
+        records = self.collection.all() or []
+        self.update([], [(record["__id"], record) for record in records])
+
+    def ensure(self) -> None:
+        marker = self.db.fetch(self.marker)
+        if marker is None:
+            self.build()
+        elif not marker.startswith(f"{INDEX_FORMAT}:".encode()):
+            # posting lists of the first format, one key per value
+            prefix = self.prefix
+            for key in [key for key, _ in self.db.items() if key.startswith(prefix)]:
+                self.db.delete(key)
+            self.build()
+
+    def invalidate(self) -> None:
+        """Forget the value directory, e.g. after a rollback."""
+        self._sort_keys = None
+
+    def clear(self) -> None:
+        for _, value in self._directory():
+            key = self.key(value)
+            for page in self._numbers(key):
+                self.db.delete(f"{key}#{page}")
+            self.db.delete(key)
+        for page in range(self._directory_pages()):
+            self.db.delete(self._directory_key(page))
+        if self.db.exists(self.marker):
+            self.db.store(self.marker, f"{INDEX_FORMAT}:0")
+        self._sort_keys = []
+
+    def add(self, id: int, record: Dict[str, Any]) -> None:
+        self.update([], [(id, record)])
+
+    def remove(self, id: int, record: Dict[str, Any]) -> None:
+        self.update([(id, record)], [])
+
+    def update(
+        self,
+        removed: Iterable[Tuple[int, Dict[str, Any]]],
+        added: Iterable[Tuple[int, Dict[str, Any]]],
+    ) -> None:
+        """Remove and add the ids of a batch of records, `removed` first.
+
+        The changes are grouped by value and page, so every page is read and
+        written once per batch.
+        """
+        changes: Dict[str, Tuple[Any, Dict[int, Tuple[Set[int], Set[int]]]]] = {}
+        for side, records in enumerate((removed, added)):
+            for id, record in records:
+                value = self.value_of(record)
+                if value is _MISSING:
+                    continue
+                pages = changes.setdefault(json.dumps(value), (value, {}))[1]
+                pages.setdefault(id // self.PAGE_SIZE, (set(), set()))[side].add(id)
+        entries = []
+        for text, (value, pages) in changes.items():
+            key = self.prefix + text
+            before = self._numbers(key)
+            after = set(before)
+            for page, (gone, new) in pages.items():
+                page_key = f"{key}#{page}"
+                ids = self._numbers(page_key) if page in before else set()
+                updated = (ids - gone) | new
+                if updated == ids:
+                    continue
+                if updated:
+                    self.db.store(page_key, ",".join(map(str, sorted(updated))))
+                    after.add(page)
+                else:
+                    self.db.delete(page_key)
+                    after.discard(page)
+            if after == before:
+                continue
+            if after:
+                self.db.store(key, ",".join(map(str, sorted(after))))
+            else:
+                self.db.delete(key)
+            if not before:
+                entries.append(f"+{text}")
+                self._insert_value(value)
+            elif not after:
+                entries.append(f"-{text}")
+                self._remove_value(value)
+        if entries:
+            self._log(entries)
+
+    def lookup(self, op: Any, constant: Any) -> Optional[Set[int]]:
+        if op is operator.eq or op is operator.is_:
+            value = normalize_value(constant)
+            if value is _MISSING or (op is operator.is_ and value is not None):
+                return None
+            if op is operator.is_:
+                return set(self.ids(value))
+            return self._equal_ids(value)
+        if op is _contains:
+            if not isinstance(constant, (list, tuple, set, frozenset)):
+                return None
+            values = [normalize_value(c) for c in constant]
+            if _MISSING in values:
+                return None
+            return {id for value in values for id in self._equal_ids(value)}
+        if op is _startswith:
+            if not isinstance(constant, str):
+                return None
+            return self._range((3, constant), (3, constant + "\U0010ffff"), True)
+        if op in (operator.lt, operator.le, operator.gt, operator.ge):
+            orderable = isinstance(constant, (int, float, str))
+            if not orderable or isinstance(constant, bool):
+                return None
+            rank = 3 if isinstance(constant, str) else 2
+            if op in (operator.lt, operator.le):
+                ids = self._range((rank,), (rank, constant), op is operator.le)
+            else:
+                ids = self._range(
+                    (rank, constant),
+                    (rank + 1,),
+                    False,
+                    include_start=op is operator.ge,
+                )
+            if rank == 2:
+                # booleans are ordered as 0 and 1 by Python
+                for flag in (False, True):
+                    if op(int(flag), constant):
+                        ids |= set(self.ids(flag))
+            return ids
+        return None
+
+    def _equal_ids(self, value: Any) -> Set[int]:
+        """Ids of the values equal to `value` in Python, `True == 1` included."""
+        ids = set(self.ids(value))
+        if isinstance(value, int) and value in (0, 1):
+            ids.update(self.ids(int(value) if isinstance(value, bool) else bool(value)))
+        return ids
+
+    def iter_ids(self, descending: bool = False) -> Iterator[int]:
+        sort_keys = self._directory()
+        for _, value in reversed(sort_keys) if descending else list(sort_keys):
+            yield from sorted(self.ids(value))
+
+    def _range(
+        self,
+        start: Tuple[Any, ...],
+        stop: Tuple[Any, ...],
+        include_stop: bool,
+        include_start: bool = True,
+    ) -> Set[int]:
+        sort_keys = self._directory()
+        lo = (bisect_left if include_start else bisect_right)(sort_keys, start)
+        hi = (bisect_right if include_stop else bisect_left)(sort_keys, stop)
+        return {id for _, value in sort_keys[lo:hi] for id in self.ids(value)}
+
+    def _numbers(self, key: str) -> Set[int]:
+        data = self.db.fetch(key)
+        return {int(number) for number in data.split(b",")} if data else set()
+
+    def _directory_key(self, page: int) -> str:
+        return f"{self.marker}#{page}"
+
+    def _directory_pages(self) -> int:
+        marker = self.db.fetch(self.marker)
+        return int(marker.split(b":")[1]) if marker else 0
+
+    def _log(self, entries: List[str]) -> None:
+        """Log values added (`+`) or removed (`-`), compacting the stale lines."""
+        pages = self._directory_pages()
+        lines = pages * self.DIRECTORY_PAGE_SIZE
+        if self._sort_keys is not None and lines > 2 * len(self._sort_keys) + 1:
+            entries = [f"+{json.dumps(value)}" for _, value in self._sort_keys]
+            for page in range(pages):
+                self.db.delete(self._directory_key(page))
+            pages = 0
+        elif pages:
+            key = self._directory_key(pages - 1)
+            last = (self.db.fetch(key) or b"").decode().split("\n")
+            room = self.DIRECTORY_PAGE_SIZE - len(last)
+            if room > 0:
+                self.db.store(key, "\n".join(last + entries[:room]))
+                entries = entries[room:]
+        size = self.DIRECTORY_PAGE_SIZE
+        for start in range(0, len(entries), size):
+            self.db.store(
+                self._directory_key(pages),
+                "\n".join(entries[start : start + size]),
+            )
+            pages += 1
+        self.db.store(self.marker, f"{INDEX_FORMAT}:{pages}")
+
+    def _directory(self) -> List[SortKey]:
+        if self._sort_keys is None:
+            values: Dict[str, Any] = {}
+            for page in range(self._directory_pages()):
+                data = self.db.fetch(self._directory_key(page)) or b""
+                for line in data.decode().split("\n"):
+                    if line.startswith("+"):
+                        values[line[1:]] = json.loads(line[1:])
+                    elif line:
+                        values.pop(line[1:], None)
+            self._sort_keys = sorted(sort_key(value) for value in values.values())
+        return self._sort_keys
+
+    def _insert_value(self, value: Any) -> None:
+        if self._sort_keys is not None:
+            key = sort_key(value)
+            position = bisect_left(self._sort_keys, key)
+            if position == len(self._sort_keys) or self._sort_keys[position] != key:
+                self._sort_keys.insert(position, key)
+
+    def _remove_value(self, value: Any) -> None:
+        if self._sort_keys is not None:
+            key = sort_key(value)
+            position = bisect_left(self._sort_keys, key)
+            if position < len(self._sort_keys) and self._sort_keys[position] == key:
+                del self._sort_keys[position]
+
+
+def plan_index_lookup(
+    query: Query,
+    indexes: Dict[str, Index],
+) -> Optional[Set[int]]:
+    """Candidate record ids of `query` from the indexes, `None` for a full scan."""
+    op, left, right = query.operator, query.left, query.right
+    if op in (operator.and_, operator.or_):
+        if not (isinstance(left, Query) and isinstance(right, Query)):
+            return None
+        left_ids = plan_index_lookup(left, indexes)
+        right_ids = plan_index_lookup(right, indexes)
+        if op is operator.or_:
+            if left_ids is None or right_ids is None:
+                return None
+            return left_ids | right_ids
+        if left_ids is None or right_ids is None:
+            return left_ids if right_ids is None else right_ids
+        return left_ids & right_ids
+    if isinstance(right, QueryPath) and not isinstance(left, (QueryPath, Query)):
+        reverse = {
+            operator.eq: operator.eq,
+            operator.lt: operator.gt,
+            operator.le: operator.ge,
+            operator.gt: operator.lt,
+            operator.ge: operator.le,
+        }
+        if op not in reverse:
+            return None
+        left, right, op = right, left, reverse[op]
+    if not isinstance(left, QueryPath) or isinstance(right, (QueryPath, Query)):
+        return None
+    index = indexes.get(".".join(left))
+    if index is None:
+        return None
+    return index.lookup(op, right)
@@ -0,0 +1,304 @@
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+import logging
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+P = TypeVar("P", bound=Callable[[Any], Any])
+Hook = Callable[["OperationEvent"], Any]
+
+logger = logging.getLogger("unqdantic")
+
+
+@dataclass
+class OperationEvent:
+    """One `Document` operation, passed to the hooks of the database when it ends.
+
+    Times are in seconds. `storage_time` covers the UnQLite calls,
+    `filter_time` evaluating query predicates in Python, `serialize_time` the
+    encoding of documents and `validate_time` building models from records.
+    `scanned` counts the record ids visited by the storage, `returned` the
+    documents or rows given back, `None` when the result is not a collection
+    of them.
+    """
+
+    collection: str
+    operation: str
+    query: Optional[str] = None
+    scanned: int = 0
+    returned: Optional[int] = None
+    duration: float = 0.0
+    storage_time: float = 0.0
+    filter_time: float = 0.0
+    serialize_time: float = 0.0
+    validate_time: float = 0.0
+    error: Optional[BaseException] = None
+
+
+_current: ContextVar[Optional[OperationEvent]] = ContextVar(
+    "unqdantic_operation",
+    default=None,
+)
+_untimed = nullcontext()
+
+
+class _Timer:
+    __slots__ = ("event", "field", "exclude", "start", "excluded")
+
+    def __init__(
+        self,
+        event: OperationEvent,
+        field: str,
+        exclude: Optional[str],
+    ) -> None:
+        self.event = event
+        self.field = field
+        self.exclude = exclude
+
+    def __enter__(self) -> None:
+        if self.exclude is not None:
+            self.excluded = getattr(self.event, self.exclude)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        elapsed = time.perf_counter() - self.start
+        if self.exclude is not None:
+            elapsed -= getattr(self.event, self.exclude) - self.excluded
+        setattr(self.event, self.field, getattr(self.event, self.field) + elapsed)
+
+
+def timer(field: str, exclude: Optional[str] = None) -> ContextManager[None]:
+    """Add the time spent in the block to `field` of the current operation.
+
+    Time added to `exclude` meanwhile, e.g. by callbacks, is not counted twice.
+    """
+    event = _current.get()
+    return _untimed if event is None else _Timer(event, field, exclude)
+
+
+def timed(predicate: P) -> P:
+    """`predicate` adding its run time to `filter_time` of the current operation."""
+    event = _current.get()
+    if event is None:
+        return predicate
+
+    def wrapper(record: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return predicate(record)
+        finally:
+            event.filter_time += time.perf_counter() - start
+
+    return wrapper  # type: ignore
+
+
+def tracking() -> bool:
+    """Whether an instrumented operation is running in this context."""
+    return _current.get() is not None
+
+
+def scanned(count: int) -> None:
+    event = _current.get()
+    if event is not None:
+        event.scanned += count
+
+
+def _returned(result: Any) -> Optional[int]:
+    if isinstance(result, (list, tuple, dict)):
+        return len(result)
+    if result is None:
+        return 0
+    if hasattr(result, "__fields__"):
+        return 1
+    return None
+
+
+def _render_query(args: Sequence[Any]) -> Optional[str]:
+    from .expression import Query
+
+    queries = [arg for arg in args if isinstance(arg, Query)]
+    return str(Query.merge(tuple(queries))) if queries else None
+
+
+@contextmanager
+def recording(event: OperationEvent) -> Iterator[OperationEvent]:
+    """Collect the work done in the block into `event`, without emitting it."""
+    token = _current.set(event)
+    start = time.perf_counter()
+    try:
+        yield event
+    finally:
+        event.duration = time.perf_counter() - start
+        _current.reset(token)
+
+
+def instrumented(operation: str) -> Callable[[F], F]:
+    """Report calls of a `Document` method to the hooks of its database.
+
+    Calls made inside an instrumented call are part of its event.
+    """
+
+    def decorator(method: F) -> F:
+        @wraps(method)
+        def wrapper(self_or_cls: Any, *args: Any, **kwargs: Any) -> Any:
+            collection = self_or_cls.collection
+            if (
+                collection is None
+                or not collection.db.hooks
+                or _current.get() is not None
+            ):
+                return method(self_or_cls, *args, **kwargs)
+            event = OperationEvent(collection.name, operation, _render_query(args))
+            token = _current.set(event)
+            start = time.perf_counter()
+            try:
+                result = method(self_or_cls, *args, **kwargs)
+                event.returned = _returned(result)
+                return result
+            except BaseException as e:
+                event.error = e
+                raise
+            finally:
+                event.duration = time.perf_counter() - start
+                _current.reset(token)
+                collection.db.emit(event)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+def emit(hooks: Sequence[Hook], event: OperationEvent) -> None:
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            logger.exception("instrumentation hook %r failed", hook)
+
+
+class SlowQueryLog:
+    """Hook logging the operations slower than `threshold` seconds.
+
+    The last `keep` slow events are also kept in `entries`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        logger: logging.Logger = logger,
+        level: int = logging.WARNING,
+        keep: int = 100,
+    ) -> None:
+        self.threshold = threshold
+        self.logger = logger
+        self.level = level
+        self.entries: Deque[OperationEvent] = deque(maxlen=keep)
+
+    def __call__(self, event: OperationEvent) -> None:
+        if event.duration < self.threshold:
+            return
+        self.entries.append(event)
+        self.logger.log(
+            self.level,
+            "slow %s.%s %.1fms query=%s scanned=%d returned=%s"
+            " storage=%.1fms filter=%.1fms serialize=%.1fms validate=%.1fms",
+            event.collection,
+            event.operation,
+            event.duration * 1e3,
+            event.query,
+            event.scanned,
+            event.returned,
+            event.storage_time * 1e3,
+            event.filter_time * 1e3,
+            event.serialize_time * 1e3,
+            event.validate_time * 1e3,
+        )
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+@dataclass
+class OperationStats:
+    count: int = 0
+    errors: int = 0
+    duration: float = 0.0
+    storage_time: float = 0.0
+    scanned: int = 0
+    returned: int = 0
+    buckets: List[int] = field(default_factory=list)
+    """Cumulative count of the operations at or below each bucket bound."""
+
+
+class Metrics:
+    """Hook keeping counters and a latency histogram per collection and operation."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds = tuple(sorted(buckets))
+        self.operations: Dict[Tuple[str, str], OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: OperationEvent) -> None:
+        key = (event.collection, event.operation)
+        with self._lock:
+            stats = self.operations.get(key)
+            if stats is None:
+                stats = self.operations[key] = OperationStats(
+                    buckets=[0] * len(self.bounds),
+                )
+            stats.count += 1
+            stats.errors += event.error is not None
+            stats.duration += event.duration
+            stats.storage_time += event.storage_time
+            stats.scanned += event.scanned
+            stats.returned += event.returned or 0
+            for i, bound in enumerate(self.bounds):
+                if event.duration <= bound:
+                    stats.buckets[i] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.operations.clear()
+
+    def snapshot(self) -> Dict[Tuple[str, str], OperationStats]:
+        with self._lock:
+            return {
+                key: OperationStats(**{**vars(stats), "buckets": list(stats.buckets)})
+                for key, stats in self.operations.items()
+            }
+
+    def render(self, prefix: str = "unqdantic") -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        for (collection, operation), stats in sorted(self.snapshot().items()):
+            labels = f'collection="{collection}",operation="{operation}"'
+            bucket = f"{prefix}_operation_seconds_bucket"
+            for bound, count in zip(self.bounds, stats.buckets):
+                lines.append(f'{bucket}{{{labels},le="{bound}"}} {count}')
+            lines += [
+                f'{bucket}{{{labels},le="+Inf"}} {stats.count}',
+                f"{prefix}_operation_seconds_sum{{{labels}}} {stats.duration}",
+                f"{prefix}_operation_seconds_count{{{labels}}} {stats.count}",
+                f"{prefix}_operation_errors_total{{{labels}}} {stats.errors}",
+                f"{prefix}_storage_seconds_total{{{labels}}} {stats.storage_time}",
+                f"{prefix}_records_scanned_total{{{labels}}} {stats.scanned}",
+                f"{prefix}_records_returned_total{{{labels}}} {stats.returned}",
+            ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,393 @@
+from dataclasses import dataclass, field
+import operator
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .expression import (
+    _contains,
+    _endswith,
+    _len,
+    _not,
+    _not_contains,
+    _startswith,
+    Query,
+    QueryPath,
+)
+
+FILTER_SCRIPT = """
+$zCallback = function($rec) {{
+    return {expression};
+}};
+$data = db_fetch_all($collection, $zCallback);
+"""
+
+PROJECT_SCRIPT = """
+$rows = [];
+foreach ($data as $rec) {{
+    array_push($rows, {row});
+}}
+$data = $rows;
+"""
+
+SCAN_SCRIPT = """
+$zCallback = function($rec) {{
+    return {expression};
+}};
+$data = [];
+while ($cursor <= $last && count($data) < $batch_size) {{
+    $rec = db_fetch_by_id($collection, $cursor);
+    $cursor++;
+    if ($rec && $zCallback($rec)) {{
+        array_push($data, {row});
+    }}
+}}
+"""
+
+AGGREGATE_SCRIPT = """
+$count = 0;
+$numeric = 0;
+$total = 0;
+$minimum = NULL;
+$maximum = NULL;
+for ($id = $first; $id <= $last; $id++) {{
+    $rec = db_fetch_by_id($collection, $id);
+    if (!$rec || !({expression})) {{
+        continue;
+    }}
+    $count++;
+    $value = {value};
+    if (is_int($value) || is_float($value)) {{
+        $numeric++;
+        $total += $value;
+        if ($minimum === NULL || $value < $minimum) {{
+            $minimum = $value;
+        }}
+        if ($maximum === NULL || $value > $maximum) {{
+            $maximum = $value;
+        }}
+    }}
+}}
+"""
+
+FETCH_SCRIPT = """
+$zCallback = function($rec) {{
+    return {expression};
+}};
+$data = [];
+foreach ($ids as $id) {{
+    $rec = db_fetch_by_id($collection, $id);
+    if ($rec && $zCallback($rec)) {{
+        array_push($data, {row});
+    }}
+}}
+"""
+
+UPDATE_SCRIPT = """
+$count = 0;
+for ($i = 0; $i < count($ids); $i++) {
+    if (db_update_record($collection, $ids[$i], $records[$i])) {
+        $count++;
+    }
+}
+"""
+
+_COMPARE_OPERATORS = {
+    operator.lt: "<",
+    operator.le: "<=",
+    operator.gt: ">",
+    operator.ge: ">=",
+}
+
+_REVERSED_OPERATORS = {
+    operator.eq: operator.eq,
+    operator.ne: operator.ne,
+    operator.lt: operator.gt,
+    operator.le: operator.ge,
+    operator.gt: operator.lt,
+    operator.ge: operator.le,
+}
+
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+Binding = Tuple[Optional[int], Callable[[Any], Any]]
+"""Index of the query constant a Jx9 parameter is derived from, and how."""
+
+
+def _param_value(value: Any) -> Any:
+    if isinstance(value, (tuple, set, frozenset)):
+        return list(value)
+    return value
+
+
+def _strings(constants: Any) -> List[Any]:
+    return [c for c in constants if isinstance(c, str)]
+
+
+def _number(value: Any) -> Any:
+    return int(value) if isinstance(value, bool) else value
+
+
+def _numbers(constants: Any) -> List[Any]:
+    return [_number(c) for c in constants if isinstance(c, (int, float))]
+
+
+class Jx9CompileError(Exception):
+    """The query contains an operator without an equivalent Jx9 form."""
+
+
+@dataclass
+class Jx9Filter:
+    expression: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    row: str = "$rec"
+
+    @property
+    def script(self) -> str:
+        script = FILTER_SCRIPT.format(expression=self.expression)
+        if self.row != "$rec":
+            script += PROJECT_SCRIPT.format(row=self.row)
+        return script
+
+    @property
+    def scan_script(self) -> str:
+        return SCAN_SCRIPT.format(expression=self.expression, row=self.row)
+
+    @property
+    def fetch_script(self) -> str:
+        return FETCH_SCRIPT.format(expression=self.expression, row=self.row)
+
+    def aggregate_script(self, path: Optional[Sequence[str]] = None) -> str:
+        value = Jx9Compiler().path(path) if path else "NULL"
+        return AGGREGATE_SCRIPT.format(expression=self.expression, value=value)
+
+
+def _literal(key: str) -> str:
+    return "'" + key.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+class Jx9Compiler:
+    """Compile queries to Jx9 expressions that agree with `Query.__call__`.
+
+    As in Python, booleans compare as the numbers 0 and 1 (`True == 1`,
+    `1 in [True]`), numbers never equal strings and `is_` is strict. Where
+    the Python evaluator raises, e.g. ordering a string against a number, the
+    Jx9 predicate is simply false.
+    """
+
+    def __init__(self, sources: Optional[Dict[int, int]] = None) -> None:
+        self.params: Dict[str, Any] = {}
+        self.bindings: List[Binding] = []
+        self.sources = sources or {}
+        self.constant: Optional[int] = None
+
+    def param(self, value: Any, transform: Callable[[Any], Any] = _param_value) -> str:
+        name = f"p{len(self.params)}"
+        self.params[name] = transform(value)
+        self.bindings.append((self.constant, transform))
+        return f"${name}"
+
+    def path(self, path: Sequence[str]) -> str:
+        if not path:
+            raise Jx9CompileError("empty query path")
+        accessors = [
+            "$rec" + "".join(f"[{_literal(k)}]" for k in path[: i + 1])
+            for i in range(len(path))
+        ]
+        if len(accessors) == 1:
+            return accessors[0]
+        guard = " && ".join(f"is_array({a})" for a in accessors[:-1])
+        return f"({guard} ? {accessors[-1]} : NULL)"
+
+    def value(self, node: Any) -> str:
+        if isinstance(node, QueryPath):
+            return self.path(node)
+        if isinstance(node, Query) and node.operator is _len:
+            value = self.value(node.left)
+            return (
+                f"(is_array({value}) ? count({value}) : "
+                f"(is_string({value}) ? strlen(utf8_decode({value})) : NULL))"
+            )
+        raise Jx9CompileError(f"{node!r} is not a Jx9 value")
+
+    @staticmethod
+    def numeric(value: str) -> str:
+        return f"(is_int({value}) || is_float({value}) || is_bool({value}))"
+
+    @staticmethod
+    def number(value: str) -> str:
+        """`value` as a number, booleans as 0 and 1 like in Python."""
+        return f"(is_bool({value}) ? ({value} ? 1 : 0) : {value})"
+
+    def equals(self, value: str, constant: Any) -> str:
+        if constant is None:
+            return f"is_null({value})"
+        if isinstance(constant, (int, float)):
+            return (
+                f"({self.numeric(value)}"
+                f" && {self.number(value)} == {self.param(constant, _number)})"
+            )
+        if isinstance(constant, str):
+            return f"(is_string({value}) && {value} === {self.param(constant)})"
+        raise Jx9CompileError(f"can not compare with {type(constant).__name__}")
+
+    def compare(self, value: str, op: str, constant: Any) -> str:
+        if constant is None:
+            raise Jx9CompileError(f"can not order by {constant!r}")
+        if isinstance(constant, (int, float)):
+            return (
+                f"({self.numeric(value)}"
+                f" && {self.number(value)} {op} {self.param(constant, _number)})"
+            )
+        if isinstance(constant, str):
+            return (
+                f"(is_string({value})"
+                f" && strcmp({value}, {self.param(constant)}) {op} 0)"
+            )
+        raise Jx9CompileError(f"can not order by {type(constant).__name__}")
+
+    def contains(self, value: str, constants: Any) -> str:
+        if not isinstance(constants, (list, tuple, set, frozenset)) or not all(
+            isinstance(c, _PRIMITIVES) for c in constants
+        ):
+            raise Jx9CompileError("in_ only supports a collection of primitives")
+        parts: List[str] = []
+        if _strings(constants):
+            strings_param = self.param(constants, _strings)
+            parts.append(
+                f"(is_string({value}) && in_array({value}, {strings_param}, TRUE))",
+            )
+        if _numbers(constants):
+            numbers_param = self.param(constants, _numbers)
+            parts.append(
+                f"({self.numeric(value)}"
+                f" && in_array({self.number(value)}, {numbers_param}))",
+            )
+        if None in constants:
+            parts.append(f"is_null({value})")
+        return "(" + (" || ".join(parts) or "FALSE") + ")"
+
+    def predicate(self, query: Any) -> str:
+        if not isinstance(query, Query):
+            raise Jx9CompileError(f"{query!r} is not a query")
+        op, left, right = query.operator, query.left, query.right
+        self.constant = self.sources.get(id(query))
+
+        if op in (operator.and_, operator.or_):
+            if not (isinstance(left, Query) and isinstance(right, Query)):
+                raise Jx9CompileError("bitwise operators are not supported")
+            joiner = " && " if op is operator.and_ else " || "
+            return f"({self.predicate(left)}{joiner}{self.predicate(right)})"
+
+        if op in _REVERSED_OPERATORS:
+            if _is_value(right) and not _is_value(left):
+                left, right, op = right, left, _REVERSED_OPERATORS[op]
+            if _is_value(right):
+                raise Jx9CompileError("can not compare two record values")
+            value = self.value(left)
+            if op is operator.eq:
+                return self.equals(value, right)
+            if op is operator.ne:
+                return f"!{self.equals(value, right)}"
+            return self.compare(value, _COMPARE_OPERATORS[op], right)
+
+        if op in (_startswith, _endswith):
+            if not isinstance(right, str):
+                raise Jx9CompileError(f"{op.__name__} only supports str")
+            value = self.value(left)
+            prefix = self.param(right)
+            if op is _startswith:
+                match = f"strncmp({value}, {prefix}, strlen({prefix})) == 0"
+            else:
+                match = f"substr({value}, -strlen({prefix})) === {prefix}"
+            return f"(is_string({value}) && (strlen({prefix}) == 0 || {match}))"
+
+        if op in (_contains, _not_contains):
+            predicate = self.contains(self.value(left), right)
+            return predicate if op is _contains else f"!{predicate}"
+
+        if op in (operator.is_, operator.is_not):
+            if right is None:
+                predicate = f"is_null({self.value(left)})"
+            elif isinstance(right, bool):
+                predicate = f"{self.value(left)} === {'TRUE' if right else 'FALSE'}"
+            else:
+                raise Jx9CompileError("is_ only supports None, True and False")
+            return predicate if op is operator.is_ else f"!{predicate}"
+
+        if op is _not:
+            value = self.value(left)
+            return f"(is_string({value}) ? strlen({value}) == 0 : !{value})"
+
+        raise Jx9CompileError(f"operator {op.__name__} has no Jx9 form")
+
+
+def _is_value(node: Any) -> bool:
+    return isinstance(node, (QueryPath, Query))
+
+
+def split_conjuncts(query: Query) -> List[Query]:
+    if (
+        query.operator is operator.and_
+        and isinstance(query.left, Query)
+        and isinstance(query.right, Query)
+    ):
+        return split_conjuncts(query.left) + split_conjuncts(query.right)
+    return [query]
+
+
+def compile_query(query: Query) -> Tuple[Optional[Jx9Filter], Optional[Query]]:
+    """Split `query` into a Jx9 filter and a residual query.
+
+    Top-level conjuncts that have a Jx9 form are pushed down into the
+    engine, the rest is returned as a `Query` that must be evaluated in
+    Python against the records the Jx9 filter produced.
+    """
+    conjuncts = split_conjuncts(query)
+    expression, compiler, residual = compile_conjuncts(conjuncts)
+    jx9_filter = Jx9Filter(expression, compiler.params) if expression else None
+    if not residual:
+        return jx9_filter, None
+    return jx9_filter, Query.merge(tuple(conjuncts[i] for i in residual))
+
+
+def compile_conjuncts(
+    conjuncts: Sequence[Query],
+    sources: Optional[Dict[int, int]] = None,
+) -> Tuple[Optional[str], Jx9Compiler, List[int]]:
+    """Jx9 expression of the conjuncts with a Jx9 form and the positions of the rest.
+
+    `sources` maps `id()` of the query nodes to the index of their constant,
+    so the compiler records which constant every parameter is bound from.
+    """
+    compiler = Jx9Compiler(sources)
+    pushed: List[str] = []
+    residual: List[int] = []
+    for position, conjunct in enumerate(conjuncts):
+        params, bindings = dict(compiler.params), list(compiler.bindings)
+        try:
+            pushed.append(compiler.predicate(conjunct))
+        except Jx9CompileError:
+            compiler.params, compiler.bindings = params, bindings
+            residual.append(position)
+    return (" && ".join(pushed) if pushed else None), compiler, residual
+
+
+def compile_projection(paths: Sequence[Sequence[str]]) -> str:
+    """Jx9 object literal holding `__id` and the values at `paths` of `$rec`."""
+    compiler = Jx9Compiler()
+    tree: Dict[str, Any] = {"__id": ("__id",)}
+    for keys in paths:
+        node = tree
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = tuple(keys)
+
+    def render(node: Dict[str, Any]) -> str:
+        items = (
+            f"{_literal(key)}: "
+            + (render(value) if isinstance(value, dict) else compiler.path(value))
+            for key, value in node.items()
+        )
+        return "{" + ", ".join(items) + "}"
+
+    return render(tree)
@@ -0,0 +1,91 @@
+from typing import (
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Type,
+    TYPE_CHECKING,
+    TypeVar,
+)
+
+if TYPE_CHECKING:
+    from .core import Database
+from .codecs import Codec
+
+from pydantic.main import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class KeyValueStore(Generic[ModelT]):
+    """Models of one type stored in the key-value side of a database.
+
+    Every key is stored as `prefix + key`, so several namespaces share one
+    database without clashing. Values go through `codec`, the codec of the
+    database by default, and the batch methods handle all their keys under one
+    lock and, for writes, in one transaction.
+    """
+
+    def __init__(
+        self,
+        db: "Database",
+        model: Type[ModelT],
+        prefix: Optional[str] = None,
+        codec: Optional[Codec] = None,
+    ) -> None:
+        self.db = db
+        self.model = model
+        self.prefix = f"{model.__name__}:" if prefix is None else prefix
+        self.codec: Codec = db.codec if codec is None else codec
+
+    def __repr__(self) -> str:
+        return f"KeyValueStore(model={self.model.__name__}, prefix={self.prefix!r})"
+
+    def store(self, key: str, value: ModelT) -> None:
+        self.db.store(self.prefix + key, self.codec.encode(value))
+
+    def __setitem__(self, key: str, value: ModelT) -> None:
+        self.store(key, value)
+
+    def fetch(self, key: str) -> Optional[ModelT]:
+        data = self.db.fetch(self.prefix + key)
+        return None if data is None else self.codec.decode(data, self.model)
+
+    def __getitem__(self, key: str) -> ModelT:
+        value = self.fetch(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def delete(self, key: str) -> bool:
+        return self.mdelete([key]) == 1
+
+    def __delitem__(self, key: str) -> None:
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def exists(self, key: str) -> bool:
+        return self.db.exists(self.prefix + key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.exists(key)
+
+    def mget(self, keys: Iterable[str]) -> List[Optional[ModelT]]:
+        """Values of `keys` in order, `None` for the missing ones."""
+        values = self.db.mget([self.prefix + key for key in keys])
+        decode, model = self.codec.decode, self.model
+        return [None if data is None else decode(data, model) for data in values]
+
+    def mset(self, values: Mapping[str, ModelT]) -> None:
+        encode = self.codec.encode
+        self.db.mset({self.prefix + key: encode(v) for key, v in values.items()})
+
+    def mdelete(self, keys: Iterable[str]) -> int:
+        return self.db.mdelete([self.prefix + key for key in keys])
+
+    def keys(self) -> Iterator[str]:
+        """Keys of the namespace without the prefix, by scanning the whole database."""
+        prefix, keys = self.prefix, self.db.keys()
+        return (key[len(prefix) :] for key in keys if key.startswith(prefix))
@@ -0,0 +1,97 @@
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+import threading
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class RWLock:
+    """Reentrant readers-writer lock preferring writers.
+
+    Any number of threads may read at the same time, a writer waits for the
+    readers to leave and blocks new ones until it is done. A thread holding
+    the write lock may also read, and both locks can be taken recursively.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition(threading.Lock())
+        self._readers: Dict[int, int] = {}
+        self._writer: Optional[int] = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers[me] -= 1
+                if not self._readers[me]:
+                    del self._readers[me]
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me:
+                self._waiting_writers += 1
+                try:
+                    while self._writer is not None or any(
+                        thread != me for thread in self._readers
+                    ):
+                        self._condition.wait()
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+            self._writer_depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer_depth -= 1
+                if not self._writer_depth:
+                    self._writer = None
+                    self._condition.notify_all()
+
+
+class NullLock:
+    """Lock of a database that is not shared between threads."""
+
+    _context = nullcontext()
+
+    def read(self) -> ContextManager[None]:
+        return self._context
+
+    def write(self) -> ContextManager[None]:
+        return self._context
+
+
+def reading(method: F) -> F:
+    """Run the method under the read lock of `self.lock`."""
+
+    @wraps(method)
+    def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore
+
+
+def writing(method: F) -> F:
+    """Run the method under the write lock of `self.lock`."""
+
+    @wraps(method)
+    def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore
@@ -1,4 +1,4 @@
-from typing import Any, Optional, Type
+from typing import Any, Optional, Sequence, Type
 
 from .core import Database
 
@@ -7,6 +7,8 @@ class MetaConfig:
     name: str
     db: Optional[Database] = None
     by_alias: bool = False
+    indexes: Sequence[str] = ()
+    trusted_load: bool = False
 
 
 def mix_meta_config(
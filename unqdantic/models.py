@@ -1,10 +1,14 @@
+from itertools import islice
 import json
 from typing import (
     Any,
     ClassVar,
     Dict,
+    Iterator,
     List,
     Optional,
+    overload,
+    Sequence,
     Tuple,
     Type,
     TYPE_CHECKING,
@@ -12,13 +16,46 @@ from typing import (
 )
 from typing_extensions import dataclass_transform, Self
 
-from .core import Collection, Database
-from .expression import Query, QueryPathProxy
+from .aggregate import AggregateFunc, Stats
+from .aio import AsyncInstance, AsyncModel
+from .core import BulkResult, Collection, Database, UpsertResult
+from .decoders import construct_document
+from .encoders import encode_document, ModelEncoder
+from .expression import (
+    order_keys,
+    OrderLike,
+    path_keys,
+    PathLike,
+    Query,
+    QueryPathProxy,
+)
+from .instrument import instrumented, OperationEvent, recording, timer
 from .meta import MetaConfig, mix_meta_config
-from .utils import generate_dict, merge_dicts, recursively_get_attr
+from .plan import Explanation
+from .utils import (
+    generate_dict,
+    merge_dicts,
+    normalize_paths,
+    recursively_get_attr,
+    same_record,
+)
 
-from pydantic.fields import Field, FieldInfo, ModelField
+from pydantic.error_wrappers import ValidationError
+from pydantic.fields import (
+    Field,
+    FieldInfo,
+    MAPPING_LIKE_SHAPES,
+    ModelField,
+    PrivateAttr,
+    SHAPE_SINGLETON,
+)
 from pydantic.main import BaseModel, ModelMetaclass
+from pydantic.utils import lenient_issubclass
+
+UNSAVED_ID = -1
+"""`id` of a document that has not been inserted yet, the real id is assigned by
+UnQLite when the document is stored."""
+_UNSET = object()
 
 
 def add_fields(model: Type["Document"], **field_definitions: Any):
@@ -56,6 +93,39 @@ def add_fields(model: Type["Document"], **field_definitions: Any):
     model.__annotations__.update(new_annotations)
 
 
+def validate_path(model: Type[BaseModel], keys: Sequence[str], value: Any) -> Any:
+    """Validate `value` for the field of `model` at the path `keys`.
+
+    The path goes through nested models by field name or alias, and through
+    the values of mapping fields.
+    """
+    field: Optional[ModelField] = None
+    fields: Optional[Dict[str, ModelField]] = model.__fields__
+    for key in keys:
+        if fields is not None:
+            field = fields.get(key) or next(
+                (f for f in fields.values() if f.alias == key),
+                None,
+            )
+        elif field.shape in MAPPING_LIKE_SHAPES and field.sub_fields:
+            field = field.sub_fields[0]
+        elif field.type_ is Any or lenient_issubclass(field.type_, dict):
+            # nothing to check inside an untyped value
+            return value
+        else:
+            field = None
+        if field is None:
+            break
+        nested = field.type_ if field.shape == SHAPE_SINGLETON else None
+        fields = nested.__fields__ if lenient_issubclass(nested, BaseModel) else None
+    if field is None:
+        raise ValueError(f"文档 {model.__name__} 没有字段 {'.'.join(keys)}")
+    value, errors = field.validate(value, {}, loc=".".join(keys), cls=model)
+    if errors:
+        raise ValidationError([errors], model)
+    return value
+
+
 @dataclass_transform(kw_only_default=True, field_specifiers=(Field, FieldInfo))
 class MetaDocument(ModelMetaclass):
     def __new__(
@@ -84,7 +154,7 @@ class MetaDocument(ModelMetaclass):
         new_cls: Type[Document] = super().__new__(cls, cname, bases, attrs, **kwargs)
 
         id_value = Field(
-            default_factory=new_cls._generate_id,
+            UNSAVED_ID,
             allow_mutation=True,
             init=False,
             unqlite_pk=True,
@@ -97,7 +167,14 @@ class MetaDocument(ModelMetaclass):
 
         return new_cls
 
+    @property
+    def aio(cls) -> AsyncModel:
+        """Asyncio facade of the class methods, e.g. `await User.aio.find_all()`."""
+        return AsyncModel(cls)  # type: ignore
+
     def __getattr__(self, name: str):
+        if name == "id":
+            return QueryPathProxy(self.__name__, "__id")
         if name in self.__fields__:  # type: ignore
             return QueryPathProxy(self.__name__, name)
         return super().__getattr__(name)  # type: ignore
@@ -119,13 +196,33 @@ class Document(BaseModel, metaclass=MetaDocument):
 
     Meta = MetaConfig
 
+    _modified: bool = PrivateAttr(False)
+    """A field was set to a new value since the document was loaded or written."""
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name not in self.__fields__:
+            return super().__setattr__(name, value)
+        old = self.__dict__.get(name, _UNSET)
+        super().__setattr__(name, value)
+        if self.__dict__.get(name, _UNSET) != old:
+            object.__setattr__(self, "_modified", True)
+        return None
+
+    @property
+    def aio(self) -> AsyncInstance:
+        """Asyncio facade of the instance methods, e.g. `await user.aio.insert()`."""
+        return AsyncInstance(self)
+
+    @instrumented("insert")
     def insert(self) -> Self:
         if self.collection is None:
             raise ValueError(f"文档 {self.__class__.__name__} 未绑定数据库")
-        id = self.collection.store(self.doc(), return_id=True)
+        id = self.collection.store(self._record(), return_id=True)
         self.id = id
+        object.__setattr__(self, "_modified", False)
         return self
 
+    @instrumented("update")
     def update(
         self,
         *,
@@ -134,84 +231,399 @@ class Document(BaseModel, metaclass=MetaDocument):
     ) -> bool:
         if self.collection is None:
             raise ValueError(f"文档 {self.__class__.__name__} 未绑定数据库")
-        if fields:
-            str_fields = {str(k): v for k, v in fields.items()}
-            for field, _value in str_fields.items():
-                field_keys = field.split(".")
-                setattr(
-                    recursively_get_attr(self, field_keys[:-1]),
-                    field_keys[-1],
-                    _value,
-                )
-        if kwargs:
-            for k, v in kwargs.items():
-                setattr(self, k, v)
-        return self.collection.update(self.id, self.doc())
+        self._assign(fields, kwargs)
+        if self._modified:
+            return self._write_changes(None)
+        # nested models edited in place are only seen by comparing the record
+        return self._write_changes(self.collection.fetch(self.id))
 
+    @instrumented("save")
     def save(self, **kwargs: Any) -> Self:
         if self.collection is None:
             raise ValueError(f"文档 {self.__class__.__name__} 未绑定数据库")
-        existing_doc = self.collection.fetch(self.id)
-        if existing_doc:
-            self.update(**kwargs)
-        else:
-            self.insert()
+        if self.id == UNSAVED_ID:
+            self._assign(None, kwargs)
+            return self.insert()
+        with self.collection.db.transaction():
+            existing_doc = self.collection.fetch(self.id)
+            if existing_doc:
+                self._assign(None, kwargs)
+                self._write_changes(existing_doc)
+            else:
+                self.insert()
+        return self
+
+    @instrumented("upsert")
+    def upsert(self, *filter: Union[Query, bool]) -> Self:
+        """Replace the first document matching `filter` with this one, or insert it.
+
+        At least one filter is required, `insert()` stores a new document.
+        """
+        if self.collection is None:
+            raise ValueError(f"文档 {self.__class__.__name__} 未绑定数据库")
+        self.id, _ = self.collection.upsert(Query.merge(filter), self._record())
         return self
 
+    def _assign(self, fields: Optional[Dict[Any, Any]], kwargs: Dict[str, Any]):
+        if fields:
+            for field, _value in fields.items():
+                field_keys = path_keys(field)
+                target = recursively_get_attr(self, field_keys[:-1])
+                old = getattr(target, field_keys[-1], _UNSET)
+                setattr(target, field_keys[-1], _value)
+                if getattr(target, field_keys[-1], _UNSET) != old:
+                    object.__setattr__(self, "_modified", True)
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+    def _write_changes(self, existing_doc: Optional[Dict[str, Any]]) -> bool:
+        """Write the document unless the stored record already holds the same data.
+
+        UnQLite always rewrites the whole record, so the saving comes from
+        skipping unchanged writes and reusing `existing_doc` for the indexes.
+        """
+        data = self._record()
+        if existing_doc is not None and same_record(existing_doc, data):
+            result = True
+        else:
+            result = self.collection.update(self.id, data, existing_doc)
+        object.__setattr__(self, "_modified", False)
+        return result
+
+    @instrumented("delete")
     def delete(self) -> bool:
         if self.collection is None:
             raise ValueError(f"文档 {self.__class__.__name__} 未绑定数据库")
         return self.collection.delete(self.id)
 
     @classmethod
+    @instrumented("upsert_many")
+    def upsert_many(
+        cls,
+        documents: Sequence[Self],
+        key: PathLike,
+        chunk_size: int = 1000,
+    ) -> UpsertResult:
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        result = cls.collection.upsert_many(
+            path_keys(key),
+            (doc._record() for doc in documents),
+            chunk_size,
+        )
+        for doc, id in zip(documents, result.ids):
+            doc.id = id
+        return result
+
+    @classmethod
+    @instrumented("update_many")
+    def update_many(
+        cls,
+        *filter: Union[Query, bool],
+        set: Dict[PathLike, Any],
+    ) -> int:
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        expression = Query.merge(filter) if filter else None
+        encoder = ModelEncoder(cls.meta.by_alias, cls.__json_encoder__)
+        changes = []
+        for path, value in set.items():
+            keys = path_keys(path)
+            changes.append((keys, encoder.encode(validate_path(cls, keys, value))))
+        return cls.collection.update_many(expression, changes)
+
+    @classmethod
+    @instrumented("delete_many")
+    def delete_many(cls, *filter: Union[Query, bool]) -> int:
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        expression = Query.merge(filter) if filter else None
+        return cls.collection.delete_many(expression)
+
+    @classmethod
+    @instrumented("save_all")
     def save_all(cls, *documents: Self) -> bool:
         if cls.collection is None:
             raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
-        if documents:
-            return cls.collection.store(
-                [doc.doc() for doc in documents],
-                return_id=False,
+        return bool(cls.insert_many(documents).ids)
+
+    @classmethod
+    @instrumented("insert_many")
+    def insert_many(
+        cls,
+        documents: Sequence[Self],
+        chunk_size: int = 1000,
+    ) -> BulkResult:
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        result = cls.collection.store_many(
+            (doc._record() for doc in documents),
+            chunk_size,
+        )
+        for doc, id in zip(documents, result.ids):
+            doc.id = id
+        return result
+
+    @overload
+    @classmethod
+    def find_all(
+        cls,
+        *filter: Union[Query, bool],
+        limit: Optional[int] = None,
+        skip: int = 0,
+        trusted: Optional[bool] = None,
+        only: None = None,
+        order_by: Union[OrderLike, Sequence[OrderLike], None] = None,
+        processes: Optional[int] = None,
+    ) -> List[Self]:
+        ...
+
+    @overload
+    @classmethod
+    def find_all(
+        cls,
+        *filter: Union[Query, bool],
+        limit: Optional[int] = None,
+        skip: int = 0,
+        trusted: Optional[bool] = None,
+        only: Sequence[PathLike],
+        order_by: Union[OrderLike, Sequence[OrderLike], None] = None,
+        processes: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        ...
+
+    @classmethod
+    @instrumented("find_all")
+    def find_all(
+        cls,
+        *filter: Union[Query, bool],
+        limit: Optional[int] = None,
+        skip: int = 0,
+        trusted: Optional[bool] = None,
+        only: Optional[Sequence[PathLike]] = None,
+        order_by: Union[OrderLike, Sequence[OrderLike], None] = None,
+        processes: Optional[int] = None,
+    ) -> Union[List[Self], List[Dict[str, Any]]]:
+        """Documents matching `filter`.
+
+        `processes` above 1 splits full scans over that many worker processes
+        reading the database file, see `Collection.find`.
+        """
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        expression = Query.merge(filter) if filter else None
+        paths = normalize_paths([path_keys(p) for p in only]) if only else None
+        if order_by is not None:
+            data = cls.collection.find_sorted(
+                expression,
+                order_keys(order_by),
+                limit,
+                skip,
+                only=paths,
+                processes=processes,
             )
-        return False
+        elif processes is not None and processes > 1:
+            data = cls.collection.find(expression, paths, processes)
+            data = data[skip:] if limit is None else data[skip : skip + limit]
+        elif limit is not None:
+            records = cls.collection.find_iter(
+                expression,
+                max(skip + limit, 1),
+                only=paths,
+            )
+            data = list(islice(records, skip, skip + limit))
+        elif expression is None and paths is None:
+            data = cls.collection.all()[skip:]
+        else:
+            data = cls.collection.find(expression, only=paths)[skip:]
+        if paths is not None:
+            return [{"id": row.pop("__id"), **row} for row in data]
+        return [cls.from_doc(doc, trusted) for doc in data]
 
     @classmethod
-    def find_all(cls, *filter: Union[Query, bool]) -> List[Self]:
+    def explain(
+        cls,
+        *filter: Union[Query, bool],
+        limit: Optional[int] = None,
+        skip: int = 0,
+        order_by: Union[OrderLike, Sequence[OrderLike], None] = None,
+        processes: Optional[int] = None,
+        analyze: bool = True,
+    ) -> Explanation:
+        """How `find_all` runs with these arguments.
+
+        With `analyze` the query is run once and the records it scanned and
+        returned and the time spent in storage, Python filters and model
+        validation are reported in `actual`; hooks are not called for it.
+        """
         if cls.collection is None:
             raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
-        if not filter:
-            return cls.all()
-        expression = Query.merge(filter)
-        data = cls.collection.filter(expression) or []
-        return [cls.from_doc(doc) for doc in data]
+        expression = Query.merge(filter) if filter else None
+        orders = order_keys(order_by) if order_by is not None else None
+        explanation = cls.collection.explain(expression, limit, orders, processes)
+        if analyze:
+            event = OperationEvent(cls.collection.name, "find_all", explanation.query)
+            with recording(event):
+                documents = cls.find_all(
+                    *filter,
+                    limit=limit,
+                    skip=skip,
+                    order_by=order_by,
+                    processes=processes,
+                )
+            event.returned = len(documents)
+            explanation.actual = event
+        return explanation
+
+    @classmethod
+    def find_iter(
+        cls,
+        *filter: Union[Query, bool],
+        batch_size: int = 1000,
+        trusted: Optional[bool] = None,
+    ) -> Iterator[Self]:
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        expression = Query.merge(filter) if filter else None
+        records = cls.collection.find_iter(expression, batch_size)
+        return (cls.from_doc(doc, trusted) for doc in records)
 
     @classmethod
-    def find_one(cls, *filter: Union[Query, bool]) -> Optional[Self]:
-        if not filter:
-            return cls.get_by_id(0)
-        docs = cls.find_all(*filter)
+    @instrumented("find_one")
+    def find_one(
+        cls,
+        *filter: Union[Query, bool],
+        trusted: Optional[bool] = None,
+    ) -> Optional[Self]:
+        docs = cls.find_all(*filter, limit=1, trusted=trusted)
         return docs[0] if docs else None
 
     @classmethod
-    def get_by_id(cls, id: int) -> Optional[Self]:
+    @instrumented("get_by_id")
+    def get_by_id(cls, id: int, trusted: Optional[bool] = None) -> Optional[Self]:
         if cls.collection is None:
             raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        cache = cls.collection.db.identity_map
+        if cache is not None:
+            model = cache.get(cls.collection.name, id)
+            if isinstance(model, cls):
+                return model
         if doc := cls.collection.fetch(id):
-            return cls.from_doc(doc)
+            model = cls.from_doc(doc, trusted)
+            if cache is not None:
+                cache.put(cls.collection.name, id, model)
+            return model
         return None
 
     @classmethod
+    @instrumented("delete_by_id")
     def delete_by_id(cls, id: int) -> bool:
         if cls.collection is None:
             raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
         return cls.collection.delete(id)
 
     @classmethod
-    def all(cls) -> List[Self]:
+    @instrumented("all")
+    def all(cls, trusted: Optional[bool] = None) -> List[Self]:
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        return [cls.from_doc(doc, trusted) for doc in cls.collection.all()]
+
+    @classmethod
+    def iter_all(cls, trusted: Optional[bool] = None) -> Iterator[Self]:
+        return cls.find_iter(trusted=trusted)
+
+    @classmethod
+    @instrumented("stats")
+    def stats(
+        cls,
+        field: Optional[PathLike],
+        *filter: Union[Query, bool],
+        processes: Optional[int] = None,
+    ) -> Stats:
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        expression = Query.merge(filter) if filter else None
+        path = path_keys(field) if field is not None else None
+        return cls.collection.stats(expression, path, processes)
+
+    @classmethod
+    @instrumented("count")
+    def count(
+        cls,
+        *filter: Union[Query, bool],
+        processes: Optional[int] = None,
+    ) -> int:
+        return cls.stats(None, *filter, processes=processes).count
+
+    @classmethod
+    @instrumented("exists")
+    def exists(cls, *filter: Union[Query, bool]) -> bool:
         if cls.collection is None:
             raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
-        return [cls.from_doc(doc) for doc in cls.collection.all()]
+        expression = Query.merge(filter) if filter else None
+        records = cls.collection.find_iter(expression, 1, only=[])
+        return next(records, None) is not None
+
+    @classmethod
+    @instrumented("sum")
+    def sum(
+        cls,
+        field: PathLike,
+        *filter: Union[Query, bool],
+        processes: Optional[int] = None,
+    ) -> Union[int, float]:
+        return cls.stats(field, *filter, processes=processes).total
 
     @classmethod
+    @instrumented("min")
+    def min(
+        cls,
+        field: PathLike,
+        *filter: Union[Query, bool],
+        processes: Optional[int] = None,
+    ) -> Optional[Any]:
+        return cls.stats(field, *filter, processes=processes).minimum
+
+    @classmethod
+    @instrumented("max")
+    def max(
+        cls,
+        field: PathLike,
+        *filter: Union[Query, bool],
+        processes: Optional[int] = None,
+    ) -> Optional[Any]:
+        return cls.stats(field, *filter, processes=processes).maximum
+
+    @classmethod
+    @instrumented("avg")
+    def avg(
+        cls,
+        field: PathLike,
+        *filter: Union[Query, bool],
+        processes: Optional[int] = None,
+    ) -> Optional[float]:
+        return cls.stats(field, *filter, processes=processes).result("avg")
+
+    @classmethod
+    @instrumented("group_by")
+    def group_by(
+        cls,
+        key: PathLike,
+        *filter: Union[Query, bool],
+        aggregate: AggregateFunc = "count",
+        field: Optional[PathLike] = None,
+        processes: Optional[int] = None,
+    ) -> Dict[Any, Any]:
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        expression = Query.merge(filter) if filter else None
+        path = path_keys(field) if field is not None else None
+        groups = cls.collection.group_stats(expression, path_keys(key), path, processes)
+        return {group: stats.result(aggregate) for group, stats in groups.items()}
+
+    @classmethod
+    @instrumented("clear")
     def clear(cls, recreate: bool = True) -> None:
         if cls.collection is None:
             raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
@@ -220,52 +632,92 @@ class Document(BaseModel, metaclass=MetaDocument):
             cls.collection.create()
 
     @classmethod
+    @instrumented("get_or_create")
     def get_or_create(
         cls,
         *filter: Union[Query, bool],
         defaults: Union[Any, Self, None] = None,
     ) -> Self:
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
         expression = Query.merge(filter)
-        if model := cls.find_one(expression):
-            return model
-        default = defaults.doc() if isinstance(defaults, Document) else defaults or {}
-        default = generate_dict({str(k): v for k, v in default.items()})
-        default = merge_dicts(expression.to_dict(), default)
-        return cls(**default).insert()
+        with cls.collection.db.transaction():
+            if model := cls.find_one(expression):
+                return model
+            return cls._create(expression, cls._default_fields(defaults))
 
     @classmethod
+    @instrumented("update_or_create")
     def update_or_create(
         cls,
         *filter: Union[Query, bool],
         defaults: Union[Any, Self, None] = None,
     ) -> Self:
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
         expression = Query.merge(filter)
-        default = defaults.doc() if isinstance(defaults, Document) else defaults or {}
-        default = generate_dict({str(k): v for k, v in default.items()})
-        if model := cls.find_one(expression):
-            model.update(**default)
+        fields = cls._default_fields(defaults)
+        with cls.collection.db.transaction():
+            record = next(cls.collection.find_iter(expression, 1), None)
+            if record is None:
+                return cls._create(expression, fields)
+            model = cls.from_doc(dict(record))
+            model._assign(fields, {})
+            model._write_changes(record)
             return model
-        default = merge_dicts(expression.to_dict(), default)
+
+    @classmethod
+    def _default_fields(cls, defaults: Union[Any, Self, None]) -> Dict[str, Any]:
+        if isinstance(defaults, Document):
+            default = defaults.doc()
+            default.pop("id", None)
+            return default
+        return {".".join(path_keys(k)): v for k, v in (defaults or {}).items()}
+
+    @classmethod
+    def _create(cls, expression: Query, fields: Dict[str, Any]) -> Self:
+        default = merge_dicts(expression.to_dict(), generate_dict(fields))
         return cls(**default).insert()
 
     @classmethod
+    @instrumented("export_all_to_dict")
     def export_all_to_dict(cls, **kwargs) -> List[Dict[str, Any]]:
         kwargs["by_alias"] = cls.meta.by_alias
         return [doc.dict(**kwargs) for doc in cls.all()]
 
     @classmethod
+    @instrumented("bulk_save_from_dict")
     def bulk_save_from_dict(cls, docs: List[Dict[str, Any]]) -> List[Self]:
-        return [cls(**doc).save() for doc in docs]
+        if cls.collection is None:
+            raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
+        with cls.collection.db.transaction():
+            return [cls(**doc).save() for doc in docs]
 
     def doc(self, **kwargs) -> Dict[str, Any]:
-        kwargs["by_alias"] = self.meta.by_alias
-        data = self.json(**kwargs)
-        return json.loads(data)
+        with timer("serialize_time"):
+            if not kwargs:
+                return encode_document(self, self.meta.by_alias)
+            kwargs["by_alias"] = self.meta.by_alias
+            data = self.json(**kwargs)
+            return json.loads(data)
+
+    def _record(self) -> Dict[str, Any]:
+        """`doc()` as stored, without `id`: UnQLite keeps the record id in `__id`."""
+        data = self.doc()
+        data.pop("id", None)
+        return data
 
     @classmethod
-    def from_doc(cls, doc: Dict[str, Any]) -> Self:
+    def from_doc(cls, doc: Dict[str, Any], trusted: Optional[bool] = None) -> Self:
         doc["id"] = doc.pop("__id")
-        return cls(**doc)
+        if trusted is None:
+            trusted = cls.meta.trusted_load
+        with timer("validate_time"):
+            if trusted:
+                model = construct_document(cls, doc, cls.meta.by_alias)
+                if model is not None:
+                    return model
+            return cls(**doc)
 
     @classmethod
     def get_last_id(cls) -> int:
@@ -273,12 +725,5 @@ class Document(BaseModel, metaclass=MetaDocument):
             raise ValueError(f"文档 {cls.__name__} 未绑定数据库")
         return cls.collection.last_record_id()
 
-    @classmethod
-    def _generate_id(cls) -> int:
-        try:
-            return cls.get_last_id() + 1
-        except ValueError:
-            return 0
-
     class Config:
         validate_assignment = True
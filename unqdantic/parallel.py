@@ -0,0 +1,165 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+    TypeVar,
+)
+
+if TYPE_CHECKING:
+    from .core import Collection, Database
+    from .expression import Query
+from .aggregate import group_stats, Stats
+from .instrument import scanned
+from .types import UnqliteOpenFlag
+from .utils import normalize_paths, recursively_get_item
+
+T = TypeVar("T")
+
+PARTS_PER_PROCESS = 4
+"""Id ranges per worker process, so a slow range does not idle the others."""
+
+
+def partition(last: int, parts: int) -> List[Tuple[int, int]]:
+    """Split the ids `0..last` into at most `parts` ranges `[start, stop)`."""
+    size = max(-(-(last + 1) // max(parts, 1)), 1)
+    return [(start, min(start + size, last + 1)) for start in range(0, last + 1, size)]
+
+
+@contextmanager
+def _open(filename: str, name: str) -> Iterator["Collection"]:
+    from .core import Database
+
+    db = Database(filename, flags=UnqliteOpenFlag.READONLY | UnqliteOpenFlag.MMAP)
+    try:
+        yield db.collection(name)
+    finally:
+        db.close()
+
+
+def _find_range(
+    filename: str,
+    name: str,
+    query: Optional["Query"],
+    only: Optional[Sequence[Sequence[str]]],
+    start: int,
+    stop: int,
+) -> List[Dict[str, Any]]:
+    with _open(filename, name) as collection:
+        return list(collection.scan(query, only=only, start=start, stop=stop))
+
+
+def _stats_range(
+    filename: str,
+    name: str,
+    query: Optional["Query"],
+    path: Optional[Sequence[str]],
+    start: int,
+    stop: int,
+) -> Stats:
+    with _open(filename, name) as collection:
+        return collection.scan_stats(query, path, start, stop)
+
+
+def _group_range(
+    filename: str,
+    name: str,
+    query: Optional["Query"],
+    key: Sequence[str],
+    path: Optional[Sequence[str]],
+    start: int,
+    stop: int,
+) -> Dict[Any, Stats]:
+    only = normalize_paths([key, path] if path else [key])
+    with _open(filename, name) as collection:
+        return group_stats(
+            collection.scan(query, only=only, start=start, stop=stop),
+            lambda row: recursively_get_item(row, list(key)),
+            lambda row: recursively_get_item(row, list(path)) if path else None,
+        )
+
+
+def committable(db: "Database") -> bool:
+    """Whether the pending writes of `db` may be committed for the workers.
+
+    Not inside a transaction, which a commit would end, nor with autocommit
+    disabled and uncommitted writes the caller may still roll back.
+    """
+    return not db._depth and (db.autocommit or not db._dirty)
+
+
+def scan_ranges(
+    collection: "Collection",
+    worker: Callable[..., T],
+    processes: int,
+    *args: Any,
+) -> List[T]:
+    """Run `worker` over the id ranges of `collection` in a process pool.
+
+    Every worker opens the database file read-only, so pending changes are
+    committed first, which `committable` must allow. The results are
+    returned in id order. Writes of the other threads wait for the scan.
+    """
+    db = collection.db
+    if db.filename == ":mem:":
+        raise ValueError("内存数据库不支持多进程扫描")
+    with db.lock.write():
+        if not committable(db):
+            raise ValueError("事务中或关闭自动提交后有未提交的修改时不支持多进程扫描")
+        db.commit()
+    with db.lock.read():
+        last = collection.last_record_id()
+        scanned(last + 1)
+        ranges = partition(last, processes * PARTS_PER_PROCESS)
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(worker, db.filename, collection.name, *args, start, stop)
+                for start, stop in ranges
+            ]
+            return [future.result() for future in futures]
+
+
+def parallel_find(
+    collection: "Collection",
+    query: Optional["Query"],
+    only: Optional[Sequence[Sequence[str]]],
+    processes: int,
+) -> List[Dict[str, Any]]:
+    parts = scan_ranges(collection, _find_range, processes, query, only)
+    return [record for part in parts for record in part]
+
+
+def parallel_stats(
+    collection: "Collection",
+    query: Optional["Query"],
+    path: Optional[Sequence[str]],
+    processes: int,
+) -> Stats:
+    stats = Stats()
+    for part in scan_ranges(collection, _stats_range, processes, query, path):
+        stats.merge(part)
+    return stats
+
+
+def parallel_group_stats(
+    collection: "Collection",
+    query: Optional["Query"],
+    key: Sequence[str],
+    path: Optional[Sequence[str]],
+    processes: int,
+) -> Dict[Any, Stats]:
+    groups: Dict[Any, Stats] = {}
+    for part in scan_ranges(collection, _group_range, processes, query, key, path):
+        for group, stats in part.items():
+            if group in groups:
+                groups[group].merge(stats)
+            else:
+                groups[group] = stats
+    return groups
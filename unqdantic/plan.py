@@ -0,0 +1,284 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import operator
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .expression import Query, QueryPath
+from .instrument import OperationEvent, timed
+from .jx9 import Binding, compile_conjuncts, Jx9Filter, split_conjuncts
+
+Record = Dict[str, Any]
+Predicate = Callable[[Record], Any]
+Factory = Callable[[Sequence[Any]], Callable[[Record], Any]]
+Shape = Hashable
+
+PLAN_CACHE_SIZE = 512
+
+
+def _constant_shape(value: Any) -> Hashable:
+    if value is None or isinstance(value, bool):
+        return (type(value), value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return (type(value), frozenset(type(v) for v in value))
+    return type(value)
+
+
+def query_shape(query: Query) -> Tuple[Shape, List[Any]]:
+    """Structure of `query` without its constants, and the constants in order."""
+    constants: List[Any] = []
+
+    def walk(node: Any) -> Shape:
+        if isinstance(node, Query):
+            return ("query", node.operator, walk(node.left), walk(node.right))
+        if isinstance(node, QueryPath):
+            return ("path", tuple(node))
+        constants.append(node)
+        return ("const", _constant_shape(node))
+
+    return walk(query), constants
+
+
+def constant_sources(query: Query) -> Dict[int, int]:
+    """Map the `id()` of the query nodes to the index of their constant."""
+    sources: Dict[int, int] = {}
+    count = 0
+
+    def walk(node: Any, parent: Optional[Query]) -> None:
+        nonlocal count
+        if isinstance(node, Query):
+            walk(node.left, node)
+            walk(node.right, node)
+        elif not isinstance(node, QueryPath):
+            if parent is not None:
+                sources.setdefault(id(parent), count)
+            count += 1
+
+    walk(query, None)
+    return sources
+
+
+def _count_constants(shape: Shape) -> int:
+    if shape[0] == "query":
+        return _count_constants(shape[2]) + _count_constants(shape[3])
+    return 1 if shape[0] == "const" else 0
+
+
+def _split_shape(shape: Shape) -> List[Shape]:
+    if (
+        shape[0] == "query"
+        and shape[1] is operator.and_
+        and shape[2][0] == "query"
+        and shape[3][0] == "query"
+    ):
+        return _split_shape(shape[2]) + _split_shape(shape[3])
+    return [shape]
+
+
+def _path_getter(keys: Tuple[str, ...]) -> Predicate:
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda record: record.get(key)
+
+    def getter(record: Record) -> Any:
+        value: Any = record
+        for key in keys:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+
+    return getter
+
+
+def _factory(shape: Shape, positions: Iterator[int]) -> Factory:
+    kind = shape[0]
+    if kind == "path":
+        getter = _path_getter(shape[1])
+        return lambda constants: getter
+    if kind == "const":
+        index = next(positions)
+
+        def constant(constants: Sequence[Any]) -> Predicate:
+            value = constants[index]
+            return lambda record: value
+
+        return constant
+    _, op, left, right = shape
+    if left[0] == "path" and right[0] == "const":
+        getter = _path_getter(left[1])
+        index = next(positions)
+
+        def compare(constants: Sequence[Any]) -> Predicate:
+            value = constants[index]
+            return lambda record: op(getter(record), value)
+
+        return compare
+    left_factory = _factory(left, positions)
+    right_factory = _factory(right, positions)
+
+    def apply(constants: Sequence[Any]) -> Predicate:
+        left_fn, right_fn = left_factory(constants), right_factory(constants)
+        return lambda record: op(left_fn(record), right_fn(record))
+
+    return apply
+
+
+def compile_predicate(shape: Shape, offset: int = 0) -> Factory:
+    """Flat closure evaluating a query of `shape` like `Query.__call__`."""
+    return _factory(shape, iter(range(offset, offset + _count_constants(shape))))
+
+
+class QueryPlan:
+    """Compiled form of every query sharing one shape.
+
+    The Jx9 expression, the parameter bindings and the Python closures are
+    built once, `bind` only plugs the constants of a concrete query in.
+    """
+
+    __slots__ = ("predicate", "expression", "bindings", "params", "residual")
+
+    def __init__(self, shape: Shape, query: Query) -> None:
+        self.predicate = compile_predicate(shape)
+        shapes = _split_shape(shape)
+        expression, compiler, residual = compile_conjuncts(
+            split_conjuncts(query),
+            constant_sources(query),
+        )
+        self.expression = expression
+        self.bindings: List[Binding] = compiler.bindings
+        self.params = compiler.params
+        self.residual: Optional[List[Factory]] = None
+        if residual:
+            offsets = [0]
+            for conjunct in shapes:
+                offsets.append(offsets[-1] + _count_constants(conjunct))
+            self.residual = [compile_predicate(shapes[i], offsets[i]) for i in residual]
+
+    def bind(self, constants: Sequence[Any]) -> "BoundQuery":
+        return BoundQuery(self, constants)
+
+
+class BoundQuery:
+    """A query plan with the constants of one query, built on access."""
+
+    __slots__ = ("plan", "constants")
+
+    def __init__(self, plan: QueryPlan, constants: Sequence[Any]) -> None:
+        self.plan = plan
+        self.constants = constants
+
+    @property
+    def predicate(self) -> Predicate:
+        return timed(self.plan.predicate(self.constants))
+
+    @property
+    def jx9_filter(self) -> Optional[Jx9Filter]:
+        """Part of the query pushed down into Jx9, `None` if nothing can be."""
+        plan, constants = self.plan, self.constants
+        if plan.expression is None:
+            return None
+        params = {
+            name: plan.params[name] if index is None else transform(constants[index])
+            for name, (index, transform) in zip(plan.params, plan.bindings)
+        }
+        return Jx9Filter(plan.expression, params)
+
+    @property
+    def residual(self) -> Optional[Predicate]:
+        """Part of the query evaluated in Python after the Jx9 filter."""
+        if self.plan.residual is None:
+            return None
+        predicates = [factory(self.constants) for factory in self.plan.residual]
+        return timed(_conjunction(predicates))
+
+
+def _conjunction(predicates: List[Predicate]) -> Predicate:
+    if len(predicates) == 1:
+        return predicates[0]
+    first, rest = predicates[0], predicates[1:]
+
+    def conjunction(record: Record) -> Any:
+        result = first(record)
+        for predicate in rest:
+            result = operator.and_(result, predicate(record))
+        return result
+
+    return conjunction
+
+
+_plans: "OrderedDict[Shape, QueryPlan]" = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+def plan_query(query: Query) -> BoundQuery:
+    """Bind `query` to the cached plan of its shape, compiling it on first use."""
+    shape, constants = query_shape(query)
+    with _plans_lock:
+        plan = _plans.get(shape)
+        if plan is not None:
+            _plans.move_to_end(shape)
+    if plan is None:
+        plan = QueryPlan(shape, query)
+        with _plans_lock:
+            _plans[shape] = plan
+            if len(_plans) > PLAN_CACHE_SIZE:
+                _plans.popitem(last=False)
+    return plan.bind(constants)
+
+
+@dataclass
+class Explanation:
+    """How a query runs, and the work of one run when it was analyzed.
+
+    `strategy` is "index" when indexes narrow down the candidates, "jx9" when
+    the whole query is evaluated in Jx9, "jx9+python" when part of it is
+    checked in Python afterwards, "python" when every record goes through the
+    Python predicate and "all" without a query. `access` names the storage
+    call and `estimated` the records it touches, an upper bound when the scan
+    stops early at a limit.
+    """
+
+    collection: str
+    query: Optional[str]
+    strategy: str
+    access: str
+    estimated: int
+    jx9: Optional[str] = None
+    processes: Optional[int] = None
+    actual: Optional[OperationEvent] = None
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.collection}: {self.query or 'all'}",
+            f"  strategy: {self.strategy} via {self.access}",
+        ]
+        if self.jx9 is not None:
+            lines.append(f"  jx9: {self.jx9}")
+        if self.processes is not None:
+            lines.append(f"  processes: {self.processes}")
+        lines.append(f"  estimated records: {self.estimated}")
+        event = self.actual
+        if event is not None:
+            lines.append(
+                f"  actual records: scanned {event.scanned}, returned {event.returned}",
+            )
+            parts = {
+                "storage": event.storage_time,
+                "filter": event.filter_time,
+                "validate": event.validate_time,
+            }
+            parts["other"] = max(event.duration - sum(parts.values()), 0.0)
+            detail = ", ".join(f"{k} {v * 1e3:.3f}ms" for k, v in parts.items())
+            lines.append(f"  time: {event.duration * 1e3:.3f}ms ({detail})")
+        return "\n".join(lines)
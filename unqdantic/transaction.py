@@ -0,0 +1,81 @@
+import time
+from types import TracebackType
+from typing import ContextManager, Optional, Type, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core import Database
+
+
+class Atomic:
+    """Transaction of a database, or a savepoint of the enclosing one.
+
+    The outermost block begins a transaction and commits it on success or
+    rolls it back on error. UnQLite has no savepoints, so a nested block
+    remembers the length of the write journal of the transaction; when it
+    fails the transaction is rolled back and the writes made before the
+    block are replayed, which leaves the enclosing block as it was.
+    With `savepoint=False` a nested block simply joins the transaction, and
+    an outermost one keeps no journal until a savepoint opens before its
+    first write; a savepoint opened later joins it too.
+    On a `:mem:` database nothing can be rolled back, so failing blocks keep
+    their writes and nothing is journaled.
+    """
+
+    def __init__(self, db: "Database", savepoint: bool = True) -> None:
+        self.db = db
+        self.savepoint = savepoint
+        self._mark: Optional[int] = None
+        self._lock: Optional[ContextManager[None]] = None
+
+    def __enter__(self) -> "Atomic":
+        self._lock = self.db.lock.write()
+        self._lock.__enter__()
+        try:
+            self._mark = self.db._begin_atomic(self.savepoint)
+        except BaseException:
+            self._lock.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        lock, self._lock = self._lock, None
+        try:
+            self.db._end_atomic(self._mark, exc_type is None)
+        finally:
+            if lock is not None:
+                lock.__exit__(exc_type, exc_val, exc_tb)
+
+
+class WriteBatch:
+    """Commit policy of `Database.batch`: every `size` writes or `interval` seconds."""
+
+    def __init__(self, size: int = 1000, interval: Optional[float] = None) -> None:
+        self.size = max(size, 1)
+        self.interval = interval
+        self.pending = 0
+        self.commits = 0
+        self.since = time.monotonic()
+
+    def __repr__(self) -> str:
+        return (
+            f"WriteBatch(size={self.size}, interval={self.interval},"
+            f" pending={self.pending}, commits={self.commits})"
+        )
+
+    def due(self) -> bool:
+        """Count one write, true when the pending writes should be committed."""
+        self.pending += 1
+        return self.pending >= self.size or (
+            self.interval is not None and time.monotonic() - self.since >= self.interval
+        )
+
+    def committed(self) -> None:
+        if self.pending:
+            self.commits += 1
+        self.pending = 0
+        self.since = time.monotonic()
@@ -1,5 +1,7 @@
 from functools import reduce
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+SortKey = Tuple[int, Any]
 
 
 def merge_dicts(a: Dict[str, Any], b: Dict[str, Any]):
@@ -48,3 +50,76 @@ def recursively_get_item(obj: Dict[str, Any], keys: List[str]):
         keys,
         obj,
     )
+
+
+def recursively_set_item(obj: Dict[str, Any], keys: Sequence[str], value: Any):
+    for key in keys[:-1]:
+        if not isinstance(obj.get(key), dict):
+            obj[key] = {}
+        obj = obj[key]
+    obj[keys[-1]] = value
+
+
+def same_record(record: Dict[str, Any], data: Dict[str, Any]) -> bool:
+    """Compare a stored record with new data, ignoring the id keys."""
+    return {k: v for k, v in record.items() if k not in ("__id", "id")} == {
+        k: v for k, v in data.items() if k != "id"
+    }
+
+
+def normalize_paths(paths: Sequence[Sequence[str]]) -> List[List[str]]:
+    unique = sorted({tuple(path) for path in paths if path}, key=len)
+    result: List[List[str]] = []
+    for path in unique:
+        if not any(path[: len(prefix)] == tuple(prefix) for prefix in result):
+            result.append(list(path))
+    return result
+
+
+def project_dict(obj: Dict[str, Any], paths: Sequence[Sequence[str]]):
+    result: Dict[str, Any] = {"__id": obj.get("__id")}
+    for keys in paths:
+        current = result
+        for key in keys[:-1]:
+            current = current.setdefault(key, {})
+        current[keys[-1]] = recursively_get_item(obj, list(keys))
+    return result
+
+
+def sort_key(value: Any) -> SortKey:
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    return (4, 0)
+
+
+class Descending:
+    __slots__ = ("key",)
+
+    def __init__(self, key: Any) -> None:
+        self.key = key
+
+    def __lt__(self, other: "Descending") -> bool:
+        return other.key < self.key
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Descending) and self.key == other.key
+
+
+def record_sort_key(
+    orders: Sequence[Tuple[List[str], bool]],
+) -> Callable[[Dict[str, Any]], Tuple[Any, ...]]:
+    def key(record: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(
+            Descending(sort_key(recursively_get_item(record, keys)))
+            if descending
+            else sort_key(recursively_get_item(record, keys))
+            for keys, descending in orders
+        )
+
+    return key